@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram_api.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -137,8 +138,42 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'collected_static'
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+RECIPE_LIST_CACHE_TIMEOUT = int(os.getenv('RECIPE_LIST_CACHE_TIMEOUT', 300))
+PRERENDERED_RESPONSE_TIMEOUT = int(
+    os.getenv('PRERENDERED_RESPONSE_TIMEOUT', 300)
+)
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+QUERY_METRICS = True if os.getenv('QUERY_METRICS') else False
+
+QUERY_BUDGET_RAISE = True if os.getenv('QUERY_BUDGET_RAISE') else False
+
+QUERY_BUDGETS = {
+    'recipes-list': 10,
+    'recipes-detail': 8,
+    'recipes-download-shopping-cart': 4,
+    'recipes-shopping-cart-summary': 4,
+    'recipes-feed': 9,
+    'recipes-changes': 12,
+    'users-list': 5,
+    'users-detail': 5,
+    'users-me': 3,
+    'users-subscribtions': 6,
+    'tags-list': 1,
+    'ingredients-list': 1,
+}
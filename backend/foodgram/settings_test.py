@@ -0,0 +1,7 @@
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+SECRET_KEY = 'test-secret-key'
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-media-')
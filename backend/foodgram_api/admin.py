@@ -1,8 +1,7 @@
 from django.contrib import admin
-from django.db import models
 
 from .models import (Tag, RecipeIngredient, Ingredient,
-                     Recipe, CheckList, Favorites)
+                     Recipe, CheckList, Favorites, ImageJob)
 
 
 class IngredientItemTabular(admin.TabularInline):
@@ -33,21 +32,12 @@ class Recipe(admin.ModelAdmin):
         IngredientItemTabular,
     )
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            favorites_count=models.Count('favorites')
-        )
-
     @admin.display(description='Ингредиенты')
     def display_ingredients(self, obj):
         return ', '.join(
             ingredient.name for ingredient in obj.ingredients.all()
         )
 
-    @admin.display(description='Добавлено в избранное (кол-во)')
-    def favorites_count(self, obj):
-        return obj.favorites_count
-
 
 @admin.register(CheckList)
 class CheckList(admin.ModelAdmin):
@@ -57,3 +47,9 @@ class CheckList(admin.ModelAdmin):
 @admin.register(Favorites)
 class Favorites(admin.ModelAdmin):
     list_display = ('recipe', 'user')
+
+
+@admin.register(ImageJob)
+class ImageJob(admin.ModelAdmin):
+    list_display = ('image', 'status', 'attempts', 'updated')
+    list_filter = ('status', )
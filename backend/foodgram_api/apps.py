@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class FoodgramApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'foodgram_api'
+
+    def ready(self):
+        from . import signals
+        post_migrate.connect(signals.create_recipe_search_schema,
+                             sender=self)
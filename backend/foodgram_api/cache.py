@@ -0,0 +1,84 @@
+from hashlib import sha1
+from time import time, time_ns
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+
+class CacheGeneration:
+    """Номер поколения данных, общий для процессов через кэш Django."""
+
+    def __init__(self, prefix, timeout):
+        self.prefix = prefix
+        self.timeout = timeout
+        self.version_key = f'{prefix}:version'
+
+    def get_version(self):
+        return cache.get_or_set(self.version_key, time_ns, None)
+
+    def invalidate(self):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, time_ns(), None)
+
+    def get_generation(self):
+        """Поколение кэша вместе с номером окна таймаута.
+
+        Кэш в памяти процесса не видит сбросов из других процессов, поэтому
+        валидаторы на его основе устаревают не дольше, чем сами записи.
+        """
+        return f'{self.get_version()}:{int(time() // max(self.timeout, 1))}'
+
+
+class PrerenderedResponse(CacheGeneration):
+    """Готовое тело ответа в памяти процесса, привязанное к поколению."""
+
+    def __init__(self, prefix, timeout):
+        super().__init__(prefix, timeout)
+        self._rendered = None
+
+    def get(self, get_data):
+        generation = self.get_generation()
+        rendered = self._rendered
+        if rendered is not None and rendered[0] == generation:
+            return rendered[1:]
+        body = JSONRenderer().render(get_data())
+        etag = f'"{sha1(body).hexdigest()}"'
+        self._rendered = (generation, etag, body)
+        return etag, body
+
+
+class ResponseCache(CacheGeneration):
+    """Общие для всех зрителей ответы в кэше Django.
+
+    Ключ включает поколение, которое сбрасывается целиком при любом
+    изменении данных; старые записи вытесняются по таймауту.
+    """
+
+    def get_key(self, request):
+        params = urlencode(sorted(
+            (key, value) for key, values in request.query_params.lists()
+            for value in values
+        ))
+        url = sha1(
+            f'{request.build_absolute_uri(request.path)}?{params}'.encode()
+        ).hexdigest()
+        return f'{self.prefix}:{self.get_version()}:{url}'
+
+    def get(self, key):
+        return cache.get(key)
+
+    def set(self, key, data):
+        cache.set(key, data, self.timeout)
+
+
+tags_response = PrerenderedResponse('tags',
+                                    settings.PRERENDERED_RESPONSE_TIMEOUT)
+ingredients_response = PrerenderedResponse(
+    'ingredients', settings.PRERENDERED_RESPONSE_TIMEOUT
+)
+recipe_list_cache = ResponseCache('recipes-list',
+                                  settings.RECIPE_LIST_CACHE_TIMEOUT)
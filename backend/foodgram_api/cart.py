@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+from threading import local
+
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
+
+from .models import CartItem, CheckList, RecipeIngredient
+
+
+class BatchedRecipes(local):
+    """Рецепты, покупки по которым пересчитываются одним запросом в конце."""
+
+    def __init__(self):
+        self.ids = set()
+
+
+batched_recipes = BatchedRecipes()
+
+
+@contextmanager
+def batch_cart_refresh(recipe_id):
+    batched_recipes.ids.add(recipe_id)
+    try:
+        yield
+    finally:
+        batched_recipes.ids.discard(recipe_id)
+
+
+def get_recipe_amounts(recipe_id):
+    return dict(
+        RecipeIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).order_by().values('ingredient').annotate(
+            total=Sum('amount')
+        ).values_list('ingredient', 'total')
+    )
+
+
+def get_cart_users(recipe_id):
+    return list(CheckList.objects.filter(
+        recipe_id=recipe_id, user__isnull=False
+    ).values_list('user_id', flat=True))
+
+
+def change_cart_totals(user_ids, deltas):
+    """Прибавляет к покупкам пользователей {ingredient_id: количество}."""
+    deltas = {
+        ingredient_id: delta
+        for ingredient_id, delta in deltas.items() if delta
+    }
+    if not (user_ids and deltas):
+        return
+    CartItem.objects.bulk_create([
+        CartItem(user_id=user_id, ingredient_id=ingredient_id)
+        for user_id in user_ids
+        for ingredient_id, delta in deltas.items() if delta > 0
+    ], ignore_conflicts=True)
+    items = CartItem.objects.filter(user_id__in=user_ids,
+                                    ingredient_id__in=deltas)
+    items.update(total_amount=Greatest(
+        F('total_amount') + Case(
+            *(When(ingredient_id=ingredient_id, then=Value(delta))
+              for ingredient_id, delta in deltas.items()),
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+        Value(0)
+    ))
+    items.filter(total_amount=0).delete()
+
+
+def add_recipe_to_cart(user_id, recipe_id, sign=1):
+    change_cart_totals([user_id], {
+        ingredient_id: sign * total
+        for ingredient_id, total in get_recipe_amounts(recipe_id).items()
+    })
+
+
+def refresh_cart_totals(user_ids=None, ingredient_ids=None):
+    """Пересобирает строки покупок по CheckList и составу рецептов."""
+    items = CartItem.objects.all()
+    lookups = {'recipe__checklist__user__isnull': False}
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+        lookups['recipe__checklist__user__in'] = user_ids
+    if ingredient_ids is not None:
+        items = items.filter(ingredient_id__in=ingredient_ids)
+        lookups['ingredient_id__in'] = ingredient_ids
+    ingredients = RecipeIngredient.objects.filter(**lookups)
+    items.delete()
+    CartItem.objects.bulk_create(
+        (CartItem(user_id=row['recipe__checklist__user'],
+                  ingredient_id=row['ingredient'],
+                  total_amount=row['total'])
+         for row in ingredients.order_by().values(
+             'recipe__checklist__user', 'ingredient'
+        ).annotate(total=Sum('amount')).iterator()),
+        batch_size=1000
+    )
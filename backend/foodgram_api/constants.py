@@ -5,6 +5,20 @@ MAX_INGREDIENT_VALUE = 32767
 MIN_COOKING_VALUE = 1
 MAX_COOKING_VALUE = 10080
 MAX_NAME_LENGH = 200
+MAX_STATUS_LENGTH = 16
+MAX_TAG_BITS = 62
+IMAGE_QUALITY = 85
+FEED_MERGE_MIN_AUTHORS = 32
+SYNC_PAGE_SIZE = 500
+SYNC_OVERLAP_SECONDS = 5
+SYNC_TOMBSTONE_DAYS = 30
+FEED_MERGE_CHUNK_SIZE = 128
+IMAGE_JOB_STALE_MINUTES = 10
+IMAGE_VARIANTS = {
+    'thumbnail': (480, None),
+    'detail': (1200, None),
+    'webp': (1200, 'WEBP'),
+}
 INGREDIENT_VALIDATION_MESSAGE = ('Ингредиентов должно быть'
                                  f'{MIN_INGREDIENT_VALUE} или более')
 MAX_INGREDIENT_VALIDATION_MESSAGE = ('Ингредиентов должно быть'
@@ -0,0 +1,56 @@
+import heapq
+from itertools import islice
+
+from django.db.models import Q
+
+from .constants import FEED_MERGE_CHUNK_SIZE, FEED_MERGE_MIN_AUTHORS
+from .models import Recipe
+
+FEED_ORDERING = ('-pub_date', '-id')
+
+
+def get_keyset_filter(position):
+    if position is None:
+        return Q()
+    pub_date, recipe_id = position
+    return Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=recipe_id)
+
+
+def scan_authors(recipes, author_ids, size):
+    """Сливает в одном запросе по size рецептов каждого автора."""
+    scans = []
+    params = []
+    for author_id in author_ids:
+        sql, scan_params = recipes.filter(
+            author_id=author_id
+        ).values('pub_date', 'id')[:size].query.sql_with_params()
+        scans.append(f'SELECT * FROM ({sql}) feed_{author_id}')
+        params.extend(scan_params)
+    merged = Recipe.objects.raw(
+        ' UNION ALL '.join(scans) + ' ORDER BY pub_date DESC, id DESC '
+        'LIMIT %s',
+        (*params, size)
+    )
+    return [(recipe.pub_date, recipe.id) for recipe in merged]
+
+
+def get_feed_keys(author_ids, position, size):
+    """Возвращает ключи (pub_date, id) size рецептов ленты после position.
+
+    Небольшой набор авторов читается одним запросом с author_id IN,
+    большой — отдельными проходами по индексу каждого автора, которые
+    сливаются пачками в SQL и затем между пачками через heapq.merge.
+    """
+    recipes = Recipe.objects.filter(
+        get_keyset_filter(position)
+    ).order_by(*FEED_ORDERING)
+    if len(author_ids) < FEED_MERGE_MIN_AUTHORS:
+        return list(recipes.filter(
+            author_id__in=author_ids
+        ).values_list('pub_date', 'id')[:size])
+    streams = [
+        scan_authors(recipes,
+                     author_ids[start:start + FEED_MERGE_CHUNK_SIZE], size)
+        for start in range(0, len(author_ids), FEED_MERGE_CHUNK_SIZE)
+    ]
+    return list(islice(heapq.merge(*streams, reverse=True), size))
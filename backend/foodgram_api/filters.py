@@ -1,17 +1,34 @@
+from django import forms
 from rest_framework.filters import SearchFilter
 from django_filters import rest_framework as filters
 
 from .models import Recipe
+from .search import ingredient_index, search_recipes, tag_mask_index
 
 
 class IngredientSearchFilter(SearchFilter):
     def filter_queryset(self, request, queryset, view):
         name = request.query_params.get('name', '')
-        return queryset.filter(name__startswith=name) if name else queryset
+        if not name:
+            return queryset
+        if view.action == 'list':
+            return ingredient_index.search(name)
+        return queryset.filter(name__istartswith=name)
+
+
+class MultipleSlugField(forms.Field):
+    widget = forms.SelectMultiple
+
+    def to_python(self, value):
+        return [slug for slug in value or () if slug]
+
+
+class MultipleSlugFilter(filters.Filter):
+    field_class = MultipleSlugField
 
 
 class RecipeFilter(filters.FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = MultipleSlugFilter(method='filter_tags')
     is_in_shopping_cart = filters.Filter(
         method='filter_is_in_shopping_cart',
         label='В чеклисте'
@@ -20,6 +37,10 @@ class RecipeFilter(filters.FilterSet):
         method='filter_is_favorited',
         label='В избранном'
     )
+    search = filters.CharFilter(
+        method='filter_search',
+        label='Поиск'
+    )
 
     class Meta:
         model = Recipe
@@ -27,10 +48,16 @@ class RecipeFilter(filters.FilterSet):
 
     def filter_is_favorited(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(is_favorited=True)
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and self.request.user.is_authenticated:
-            return queryset.filter(checklist__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
         return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_tags(self, queryset, name, value):
+        return tag_mask_index.filter(queryset, value) if value else queryset
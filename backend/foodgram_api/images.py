@@ -0,0 +1,148 @@
+import os
+import re
+from hashlib import sha256
+from io import BytesIO
+from os.path import splitext
+
+from datetime import timedelta
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .constants import IMAGE_JOB_STALE_MINUTES, IMAGE_QUALITY, IMAGE_VARIANTS
+from .cache import recipe_list_cache
+from .models import ImageJob, ImageStatus, Recipe
+
+IMAGES_DIR = 'images'
+HASHED_NAME = re.compile(rf'^{IMAGES_DIR}/(?P<digest>[0-9a-f]{{64}})\.\w+$')
+VARIANT_NAME = re.compile(
+    rf'^{IMAGES_DIR}/(?P<digest>[0-9a-f]{{64}})_(?P<variant>\w+)\.\w+$'
+)
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+
+def get_variant_name(name, variant):
+    match = HASHED_NAME.match(name or '')
+    if not match:
+        return None
+    _, image_format = IMAGE_VARIANTS[variant]
+    extension = (FORMAT_EXTENSIONS[image_format] if image_format
+                 else splitext(name)[1].lstrip('.'))
+    return f'{IMAGES_DIR}/{match.group("digest")}_{variant}.{extension}'
+
+
+def get_variant_urls(image):
+    urls = {'original': image.url}
+    ready = getattr(
+        image.instance, 'image_status', ImageStatus.READY
+    ) == ImageStatus.READY
+    for variant in IMAGE_VARIANTS:
+        name = get_variant_name(image.name, variant) if ready else None
+        urls[variant] = image.storage.url(name) if name else image.url
+    return urls
+
+
+def save_original(content):
+    content.seek(0)
+    data = content.read()
+    extension = splitext(content.name)[1].lower() or '.png'
+    name = f'{IMAGES_DIR}/{sha256(data).hexdigest()}{extension}'
+    if not default_storage.exists(name):
+        default_storage.save(name, ContentFile(data))
+    else:
+        # Повторная загрузка не должна выглядеть старой для collect_media.
+        os.utime(default_storage.path(name))
+    return name
+
+
+def generate_variants(name):
+    with default_storage.open(name) as file:
+        source = Image.open(file)
+        source_format = source.format
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    for variant, (size, image_format) in IMAGE_VARIANTS.items():
+        variant_name = get_variant_name(name, variant)
+        if default_storage.exists(variant_name):
+            continue
+        image_format = image_format or (
+            source_format if source_format in FORMAT_EXTENSIONS else 'PNG'
+        )
+        image = source.copy()
+        image.thumbnail((size, size))
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        buffer = BytesIO()
+        image.save(buffer, format=image_format, optimize=True,
+                   quality=IMAGE_QUALITY)
+        default_storage.save(variant_name, ContentFile(buffer.getvalue()))
+
+
+def get_recipe_image_status(job_status):
+    if job_status == ImageStatus.PROCESSING:
+        return ImageStatus.PENDING
+    return job_status
+
+
+def enqueue_image(name):
+    job, _ = ImageJob.objects.get_or_create(image=name)
+    if job.status == ImageStatus.FAILED:
+        ImageJob.objects.filter(
+            pk=job.pk, status=ImageStatus.FAILED
+        ).update(status=ImageStatus.PENDING, attempts=0, error='',
+                 updated=timezone.now())
+        return ImageStatus.PENDING
+    return get_recipe_image_status(job.status)
+
+
+def sync_image_status(recipe_id, name):
+    """Переносит в рецепт статус задачи, завершённой до коммита рецепта."""
+    job_status = ImageJob.objects.filter(
+        image=name
+    ).values_list('status', flat=True).first()
+    if job_status is not None:
+        Recipe.objects.filter(pk=recipe_id, image=name).exclude(
+            image_status=get_recipe_image_status(job_status)
+        ).update(image_status=get_recipe_image_status(job_status),
+                 updated_at=timezone.now())
+
+
+def requeue_stale_jobs():
+    return ImageJob.objects.filter(
+        status=ImageStatus.PROCESSING,
+        updated__lt=timezone.now() - timedelta(
+            minutes=IMAGE_JOB_STALE_MINUTES
+        )
+    ).update(status=ImageStatus.PENDING)
+
+
+def claim_image_job():
+    with transaction.atomic():
+        job = ImageJob.objects.select_for_update(skip_locked=True).filter(
+            status=ImageStatus.PENDING
+        ).first()
+        if job is None:
+            return None
+        job.status = ImageStatus.PROCESSING
+        job.attempts += 1
+        job.save(update_fields=('status', 'attempts', 'updated'))
+    return job
+
+
+def run_image_job(job):
+    try:
+        generate_variants(job.image)
+    except Exception as error:
+        job.status, job.error = ImageStatus.FAILED, str(error)
+    else:
+        job.status, job.error = ImageStatus.READY, ''
+    with transaction.atomic():
+        job.save(update_fields=('status', 'error', 'updated'))
+        Recipe.objects.filter(image=job.image).update(
+            image_status=job.status, updated_at=timezone.now()
+        )
+    recipe_list_cache.invalidate()
+    return job
@@ -1,62 +1,75 @@
 import csv
 import json
+from itertools import islice
+from time import perf_counter
 
+from django.db import transaction
 from termcolor import colored
 
+from .cache import ingredients_response, recipe_list_cache, tags_response
 from .models import Ingredient, Tag
-
-
-def import_ingredients_from_csv():
+from .search import ingredient_index, tag_mask_index
+
+TAGS_DATA = (
+    {'name': 'Завтрак', 'color': '#EE204D', 'slug': 'breakfast'},
+    {'name': 'Обед', 'color': '#008000', 'slug': 'lunch'},
+    {'name': 'Ужин', 'color': '#78DBE2', 'slug': 'dinner'},
+)
+
+
+def read_ingredients_csv(path):
+    with open(path, 'r', encoding='utf-8') as csv_file:
+        for name, measurement_unit in csv.reader(csv_file):
+            yield {'name': name, 'measurement_unit': measurement_unit}
+
+
+def read_ingredients_json(path):
+    with open(path, 'rb') as json_file:
+        for el in json.load(json_file):
+            yield {'name': el['name'],
+                   'measurement_unit': el['measurement_unit']}
+
+
+def bulk_load(model, rows, batch_size):
+    print(colored('Началась загрузка: '
+                  f'{model._meta.verbose_name_plural}', 'yellow'))
+    started = perf_counter()
+    existing = model.objects.count()
+    processed = 0
+    rows = iter(rows)
+    with transaction.atomic():
+        while True:
+            batch = [model(**row) for row in islice(rows, batch_size)]
+            if not batch:
+                break
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+            processed += len(batch)
+    created = model.objects.count() - existing
+    elapsed = perf_counter() - started
+    print(colored(f'Обработано строк: {processed}, добавлено: {created}, '
+                  f'{processed / elapsed:.0f} строк/с', 'green'))
+    return created
+
+
+def invalidate(*caches):
+    """bulk_create не отправляет сигналы, поэтому кэши сбрасываются явно."""
+    for cache in caches:
+        cache.invalidate()
+
+
+def import_ingredients(path, batch_size):
+    reader = (read_ingredients_json if str(path).endswith('.json')
+              else read_ingredients_csv)
     try:
-        with open('data/ingredients.csv',
-                  'r',
-                  encoding='utf-8') as csv_file:
-
-            print(colored('Началась загрузка ингредиентов', 'yellow'))
-
-            for name, measurement_unit in csv.reader(csv_file):
-                Ingredient.objects.create(
-                    name=name,
-                    measurement_unit=measurement_unit
-                )
-
-        print(colored('Данные из CSV загружены', 'green'))
-
+        created = bulk_load(Ingredient, reader(path), batch_size)
     except FileNotFoundError:
-        print(colored('Error: File not found.', 'red'))
-
-    except Exception as e:
-        print(colored(f'Error: {e}', 'red'))
-
-
-def import_ingredients_from_json():
-    try:
-        with open('/data/ingredients.json',
-                  'rb') as f:
-            data = json.load(f)
-            print(colored('Началась загрузка ингредиентов', 'yellow'))
-
-            for el in data:
-                Ingredient.objects.create(name=el['name'],
-                                          unit=el['measurement_unit'])
-        print(colored('Данные из JSON загружены', 'green'))
-    except FileNotFoundError:
-        print(colored('Error: File not found.', 'red'))
-
-    except Exception as e:
-        print(f'Error: {e}', 'red')
-
-
-def create_tags():
-    print(colored('Началась загрузка тегов', 'yellow'))
-
-    tags_data = [
-        {'name': 'Завтрак', 'color': '#EE204D', 'slug': 'breakfast'},
-        {'name': 'Обед', 'color': '#008000', 'slug': 'lunch'},
-        {'name': 'Ужин', 'color': '#78DBE2', 'slug': 'dinner'},
-    ]
+        print(colored(f'Error: File {path} not found.', 'red'))
+        return None
+    invalidate(ingredient_index, ingredients_response, recipe_list_cache)
+    return created
 
-    for tag_data in tags_data:
-        Tag.objects.create(**tag_data)
 
-    print(colored('Загрузка тегов завершена успешно!', 'green'))
+def create_tags(batch_size):
+    created = bulk_load(Tag, TAGS_DATA, batch_size)
+    invalidate(tags_response, tag_mask_index, recipe_list_cache)
+    return created
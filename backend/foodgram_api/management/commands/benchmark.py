@@ -0,0 +1,167 @@
+import json
+import random
+from datetime import datetime, timezone
+from time import perf_counter
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from termcolor import colored
+
+from foodgram_api.models import Ingredient, Recipe, Tag
+from users.models import FoodgramUser
+from .seed_data import SEED_PREFIX
+
+IMAGE = ('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAAAl21b'
+         'KAAAAA1BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYAAAAAIAAeIhvD'
+         'MAAAAASUVORK5CYII=')
+
+
+def percentile(values, rank):
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, round(rank / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Прогоняет набор запросов к API и сохраняет статистику в JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на сценарий')
+        parser.add_argument('--base-url',
+                            help='Адрес запущенного сервера вместо '
+                                 'тестового клиента Django')
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        user = FoodgramUser.objects.filter(
+            username__startswith=SEED_PREFIX
+        ).order_by('id').first()
+        if user is None:
+            raise CommandError('Нет данных: выполните manage.py seed_data')
+        self.rng = random.Random(options['seed'])
+        self.token = Token.objects.get_or_create(user=user)[0].key
+        self.base_url = options['base_url']
+        self.client = Client(HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.recipes = list(Recipe.objects.values_list('id', flat=True))
+        self.tags = list(Tag.objects.values_list('slug', flat=True))
+        self.ingredients = list(Ingredient.objects.values_list('id', 'name'))
+        created_before = set(user.recipes.values_list('id', flat=True))
+
+        started = perf_counter()
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            results = {
+                name: self.run_scenario(scenario, options['requests'])
+                for name, scenario in self.get_scenarios()
+            }
+        elapsed = perf_counter() - started
+        user.recipes.exclude(id__in=created_before).delete()
+
+        report = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'target': self.base_url or 'django.test.Client',
+            'recipes': len(self.recipes),
+            'requests_per_scenario': options['requests'],
+            'total_seconds': round(elapsed, 3),
+            'scenarios': results,
+        }
+        with open(options['output'], 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        for name, result in results.items():
+            print(f'{name:<16} p50={result["p50_ms"]:>8} '
+                  f'p95={result["p95_ms"]:>8} p99={result["p99_ms"]:>8} '
+                  f'queries={result["queries_per_request"]} '
+                  f'rps={result["requests_per_second"]}')
+        print(colored(f'Результаты сохранены в {options["output"]}',
+                      'green'))
+
+    def get_scenarios(self):
+        return (
+            ('feed', lambda: self.request(
+                'get', '/api/recipes/?page={}&tags={}&tags={}'.format(
+                    self.rng.randint(1, 5),
+                    *self.rng.sample(self.tags, min(2, len(self.tags)))
+                )
+            )),
+            ('feed_favorited', lambda: self.request(
+                'get', '/api/recipes/?is_favorited=1'
+            )),
+            ('detail', lambda: self.request(
+                'get', f'/api/recipes/{self.rng.choice(self.recipes)}/'
+            )),
+            ('subscriptions', lambda: self.request(
+                'get', '/api/users/subscriptions/?recipes_limit=3'
+            )),
+            ('cart_download', lambda: self.request(
+                'get', '/api/recipes/download_shopping_cart/'
+            )),
+            ('autocomplete', lambda: self.request(
+                'get', '/api/ingredients/?name={}'.format(
+                    self.rng.choice(self.ingredients)[1][:2]
+                )
+            )),
+            ('recipe_create', lambda: self.request(
+                'post', '/api/recipes/', {
+                    'name': 'Рецепт для нагрузки',
+                    'text': 'Описание',
+                    'cooking_time': 10,
+                    'image': IMAGE,
+                    'tags': list(Tag.objects.values_list('id', flat=True)),
+                    'ingredients': [
+                        {'id': ingredient, 'amount': 10}
+                        for ingredient, _ in self.rng.sample(
+                            self.ingredients, min(8, len(self.ingredients))
+                        )
+                    ],
+                }
+            )),
+        )
+
+    def request(self, method, path, data=None):
+        if self.base_url:
+            request = Request(
+                self.base_url.rstrip('/') + path,
+                method=method.upper(),
+                data=json.dumps(data).encode() if data else None,
+                headers={'Authorization': f'Token {self.token}',
+                         'Content-Type': 'application/json'}
+            )
+            with urlopen(request) as response:
+                response.read()
+            return
+        response = getattr(self.client, method)(
+            path, data, content_type='application/json'
+        ) if data else getattr(self.client, method)(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        if response.status_code >= 400:
+            raise CommandError(f'{method.upper()} {path}: '
+                               f'{response.status_code}')
+
+    def run_scenario(self, scenario, requests):
+        durations = []
+        queries = 0
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as context:
+                started = perf_counter()
+                scenario()
+                durations.append((perf_counter() - started) * 1000)
+            queries += len(context.captured_queries)
+        return {
+            'requests': requests,
+            'p50_ms': round(percentile(durations, 50), 2),
+            'p95_ms': round(percentile(durations, 95), 2),
+            'p99_ms': round(percentile(durations, 99), 2),
+            'queries_per_request': (
+                None if self.base_url else round(queries / requests, 2)
+            ),
+            'requests_per_second': round(
+                requests / (sum(durations) / 1000), 1
+            ),
+        }
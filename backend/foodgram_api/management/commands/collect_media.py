@@ -0,0 +1,97 @@
+import os
+import shutil
+from itertools import islice
+from time import perf_counter, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from termcolor import colored
+
+from foodgram_api.images import IMAGES_DIR, VARIANT_NAME
+from foodgram_api.models import ImageJob, Recipe
+
+IMAGE_EXTENSIONS = ('png', 'jpg', 'jpeg', 'gif', 'webp')
+
+
+def scan_files(path, min_age):
+    newest = time() - min_age
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_file() and entry.stat().st_mtime < newest:
+                yield entry
+
+
+def get_original_names(name):
+    match = VARIANT_NAME.match(name)
+    if not match:
+        return (name, )
+    return tuple(f'{IMAGES_DIR}/{match.group("digest")}.{extension}'
+                 for extension in IMAGE_EXTENSIONS)
+
+
+class Command(BaseCommand):
+    help = 'Удаляет изображения, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Только показать, что будет удалено')
+        parser.add_argument('--quarantine',
+                            help='Переместить файлы в каталог '
+                                 'вместо удаления')
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Не трогать файлы моложе N секунд')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        if options['quarantine'] and not options['dry_run']:
+            os.makedirs(options['quarantine'], exist_ok=True)
+        scanned = orphans = orphan_bytes = 0
+        entries = scan_files(os.path.join(settings.MEDIA_ROOT, IMAGES_DIR),
+                             options['min_age'])
+        while True:
+            batch = list(islice(entries, options['batch_size']))
+            if not batch:
+                break
+            scanned += len(batch)
+            for entry in self.find_orphans(batch):
+                orphans += 1
+                orphan_bytes += entry.stat().st_size
+                self.collect(entry, options)
+        elapsed = perf_counter() - started
+        action = ('Будет освобождено' if options['dry_run']
+                  else 'Освобождено')
+        print(colored(f'Проверено файлов: {scanned}, без ссылок: {orphans}. '
+                      f'{action} {orphan_bytes / 2 ** 20:.1f} МБ, '
+                      f'{scanned / elapsed:.0f} файлов/с', 'green'))
+
+    @staticmethod
+    def find_orphans(batch):
+        originals = {
+            entry.name: get_original_names(f'{IMAGES_DIR}/{entry.name}')
+            for entry in batch
+        }
+        referenced = set(Recipe.objects.filter(image__in={
+            name for names in originals.values() for name in names
+        }).values_list('image', flat=True).distinct().iterator())
+        return [
+            entry for entry in batch
+            if referenced.isdisjoint(originals[entry.name])
+        ]
+
+    @staticmethod
+    def collect(entry, options):
+        name = f'{IMAGES_DIR}/{entry.name}'
+        if options['dry_run']:
+            print(name)
+            return
+        ImageJob.objects.filter(image=name).delete()
+        if options['quarantine']:
+            shutil.move(entry.path,
+                        os.path.join(options['quarantine'], entry.name))
+        else:
+            os.remove(entry.path)
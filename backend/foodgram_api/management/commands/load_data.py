@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from foodgram_api.import_data import create_tags, import_ingredients
+
+
+class Command(BaseCommand):
+    help = 'Загружает ингредиенты (CSV или JSON) и теги пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ingredients',
+            default=settings.BASE_DIR / 'data' / 'ingredients.csv',
+            help='Путь к файлу ингредиентов (.csv или .json)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-tags', action='store_true',
+                            help='Не загружать теги')
+
+    def handle(self, *args, **options):
+        import_ingredients(options['ingredients'], options['batch_size'])
+        if not options['no_tags']:
+            create_tags(options['batch_size'])
@@ -0,0 +1,33 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from termcolor import colored
+
+from foodgram_api.images import (claim_image_job, requeue_stale_jobs,
+                                 run_image_job)
+from foodgram_api.models import ImageStatus
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь изображений рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Завершиться, когда очередь опустеет')
+        parser.add_argument('--sleep', type=float, default=2,
+                            help='Пауза между проверками очереди, с')
+
+    def handle(self, *args, **options):
+        while True:
+            requeue_stale_jobs()
+            job = claim_image_job()
+            if job is None:
+                if options['once']:
+                    break
+                sleep(options['sleep'])
+                continue
+            job = run_image_job(job)
+            if job.status == ImageStatus.READY:
+                print(colored(f'{job.image}: готово', 'green'))
+            else:
+                print(colored(f'{job.image}: {job.error}', 'red'))
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from termcolor import colored
+
+from foodgram_api.constants import SYNC_TOMBSTONE_DAYS
+from foodgram_api.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = ('Удаляет записи об удалениях старше срока, после которого '
+            'клиенты выполняют полную синхронизацию')
+
+    def handle(self, *args, **options):
+        deleted, _ = Tombstone.objects.filter(
+            deleted_at__lt=timezone.now() - timedelta(
+                days=SYNC_TOMBSTONE_DAYS
+            )
+        ).delete()
+        print(colored(f'Удалено записей: {deleted}', 'green'))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from termcolor import colored
+
+from foodgram_api.cart import refresh_cart_totals
+from foodgram_api.models import CheckList, Favorites, Recipe
+from foodgram_api.search import update_tags_mask
+from users.models import FoodgramUser, Follow
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0
+    )
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики рецептов, подписчиков, избранного, '
+            'битовые маски тегов и списки покупок')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            recipes = Recipe.objects.update(
+                favorites_count=count_subquery(Favorites, 'recipe'),
+                in_carts_count=count_subquery(CheckList, 'recipe'),
+            )
+            update_tags_mask(Recipe.objects.all())
+            refresh_cart_totals()
+            users = FoodgramUser.objects.update(
+                recipes_count=count_subquery(Recipe, 'author'),
+                followers_count=count_subquery(Follow, 'recipe_owner'),
+            )
+        print(colored(f'Пересчитано рецептов: {recipes}, '
+                      f'пользователей: {users}', 'green'))
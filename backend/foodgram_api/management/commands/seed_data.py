@@ -0,0 +1,163 @@
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from termcolor import colored
+
+from foodgram_api.import_data import create_tags, import_ingredients
+from foodgram_api.models import (CheckList, Favorites, Ingredient,
+                                 Recipe, RecipeIngredient, Tag)
+from users.models import FoodgramUser, Follow
+
+SEED_PREFIX = 'seed_'
+SEED_PASSWORD = 'seed_password'
+
+
+class Command(BaseCommand):
+    help = 'Создаёт синтетические данные для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--recipes', type=int, default=1000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows', type=int, default=10,
+                            help='Подписок на пользователя')
+        parser.add_argument('--favorites', type=int, default=20,
+                            help='Рецептов в избранном на пользователя')
+        parser.add_argument('--cart', type=int, default=5,
+                            help='Рецептов в покупках на пользователя')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true',
+                            help='Удалить ранее созданные данные')
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        if options['clear']:
+            FoodgramUser.objects.filter(
+                username__startswith=SEED_PREFIX
+            ).delete()
+        if not Ingredient.objects.exists():
+            import_ingredients(
+                settings.BASE_DIR / 'data' / 'ingredients.csv', batch_size
+            )
+        if not Tag.objects.exists():
+            create_tags(batch_size)
+
+        with transaction.atomic():
+            users = self.create_users(options['users'], batch_size)
+            recipes = self.create_recipes(
+                rng, users, options['recipes'],
+                options['ingredients_per_recipe'], batch_size
+            )
+            self.create_relations(rng, users, recipes, options, batch_size)
+        call_command('recount_counters')
+        print(colored(f'Синтетических пользователей: {len(users)}, '
+                      f'новых рецептов: {len(recipes)} '
+                      f'за {perf_counter() - started:.1f} с', 'green'))
+
+    @staticmethod
+    def create_users(count, batch_size):
+        password = make_password(SEED_PASSWORD)
+        offset = FoodgramUser.objects.filter(
+            username__startswith=SEED_PREFIX
+        ).count()
+        FoodgramUser.objects.bulk_create(
+            (
+                FoodgramUser(
+                    username=f'{SEED_PREFIX}{number}',
+                    email=f'{SEED_PREFIX}{number}@example.com',
+                    first_name=f'Имя{number}',
+                    last_name=f'Фамилия{number}',
+                    password=password,
+                )
+                for number in range(offset, offset + count)
+            ),
+            batch_size=batch_size
+        )
+        return list(FoodgramUser.objects.filter(
+            username__startswith=SEED_PREFIX
+        ).values_list('id', flat=True))
+
+    @staticmethod
+    def create_recipes(rng, users, count, ingredients_per_recipe,
+                       batch_size):
+        existing = set(Recipe.objects.filter(
+            author_id__in=users
+        ).values_list('id', flat=True))
+        Recipe.objects.bulk_create(
+            (
+                Recipe(
+                    author_id=rng.choice(users),
+                    name=f'Рецепт {number}',
+                    text=f'Описание рецепта {number}',
+                    image='images/seed.png',
+                    cooking_time=rng.randint(1, 180),
+                )
+                for number in range(count)
+            ),
+            batch_size=batch_size
+        )
+        recipes = [
+            pk for pk in Recipe.objects.filter(
+                author_id__in=users
+            ).values_list('id', flat=True)
+            if pk not in existing
+        ]
+        tags = list(Tag.objects.values_list('id', flat=True))
+        ingredients = list(Ingredient.objects.values_list('id', flat=True))
+        RecipeTag = Recipe.tags.through
+        RecipeTag.objects.bulk_create(
+            (
+                RecipeTag(recipe_id=recipe, tag_id=tag)
+                for recipe in recipes
+                for tag in rng.sample(tags, rng.randint(1, len(tags)))
+            ),
+            batch_size=batch_size
+        )
+        RecipeIngredient.objects.bulk_create(
+            (
+                RecipeIngredient(recipe_id=recipe, ingredient_id=ingredient,
+                                 amount=rng.randint(1, 500))
+                for recipe in recipes
+                for ingredient in rng.sample(
+                    ingredients, min(ingredients_per_recipe, len(ingredients))
+                )
+            ),
+            batch_size=batch_size
+        )
+        return recipes
+
+    @staticmethod
+    def create_relations(rng, users, recipes, options, batch_size):
+        Follow.objects.bulk_create(
+            (
+                Follow(subscriber_id=user, recipe_owner_id=author)
+                for user in users
+                for author in rng.sample(
+                    users, min(options['follows'], len(users))
+                )
+                if author != user
+            ),
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+        for model, per_user in ((Favorites, options['favorites']),
+                                (CheckList, options['cart'])):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user, recipe_id=recipe)
+                    for user in users
+                    for recipe in rng.sample(
+                        recipes, min(per_user, len(recipes))
+                    )
+                ),
+                batch_size=batch_size,
+                ignore_conflicts=True
+            )
@@ -0,0 +1,121 @@
+import logging
+from collections import defaultdict
+from contextlib import ExitStack
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+METRICS = (
+    ('requests_total', 'Количество запросов'),
+    ('db_queries_total', 'Количество SQL-запросов'),
+    ('db_seconds_total', 'Время выполнения SQL-запросов'),
+    ('renderer_seconds_total', 'Время рендерера DRF без сериализации'),
+    ('request_seconds_total', 'Время обработки запроса'),
+    ('response_bytes_total', 'Размер ответов'),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._metrics = defaultdict(lambda: defaultdict(float))
+
+    def record(self, labels, **values):
+        with self._lock:
+            metrics = self._metrics[labels]
+            metrics['requests_total'] += 1
+            for name, value in values.items():
+                metrics[name] += value
+
+    def clear(self):
+        with self._lock:
+            self._metrics.clear()
+
+    def render(self):
+        with self._lock:
+            metrics = {
+                labels: dict(values)
+                for labels, values in self._metrics.items()
+            }
+        lines = []
+        for name, description in METRICS:
+            lines.append(f'# HELP foodgram_{name} {description}')
+            lines.append(f'# TYPE foodgram_{name} counter')
+            for (view, method), values in sorted(metrics.items()):
+                lines.append(f'foodgram_{name}{{view="{view}",'
+                             f'method="{method}"}} {values.get(name, 0):g}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += perf_counter() - started
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        request.metrics_view_finished = None
+        started = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        finished = perf_counter()
+
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        render_started = request.metrics_view_finished or finished
+        registry.record(
+            (view, request.method),
+            db_queries_total=counter.count,
+            db_seconds_total=counter.seconds,
+            renderer_seconds_total=finished - render_started,
+            request_seconds_total=finished - started,
+            response_bytes_total=(
+                0 if response.streaming else len(response.content)
+            ),
+        )
+        self.check_budget(view, request.method, counter.count)
+        return response
+
+    def process_template_response(self, request, response):
+        request.metrics_view_finished = perf_counter()
+        return response
+
+    @staticmethod
+    def check_budget(view, method, queries):
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view)
+        if budget is None or queries <= budget:
+            return
+        message = (f'{method} {view}: {queries} SQL-запросов '
+                   f'при бюджете {budget}')
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
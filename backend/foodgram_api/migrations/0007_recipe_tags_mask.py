@@ -0,0 +1,32 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:37
+
+from django.db import migrations, models
+
+MAX_TAG_BITS = 62
+
+
+def fill_tags_mask(apps, schema_editor):
+    Recipe = apps.get_model('foodgram_api', 'Recipe')
+    masks = {}
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        tag_id__lte=MAX_TAG_BITS
+    ).values_list('recipe_id', 'tag_id').iterator():
+        masks[recipe_id] = masks.get(recipe_id, 0) | 1 << (tag_id - 1)
+    for recipe_id, mask in masks.items():
+        Recipe.objects.filter(pk=recipe_id).update(tags_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foodgram_api', '0006_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tags_mask',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False, verbose_name='Битовая маска тегов'),
+        ),
+        migrations.RunPython(fill_tags_mask, migrations.RunPython.noop),
+    ]
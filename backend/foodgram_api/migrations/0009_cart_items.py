@@ -0,0 +1,51 @@
+# Generated by Django 3.2.16 on 2026-10-18 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def fill_cart_items(apps, schema_editor):
+    CartItem = apps.get_model('foodgram_api', 'CartItem')
+    RecipeIngredient = apps.get_model('foodgram_api', 'RecipeIngredient')
+    CartItem.objects.bulk_create(
+        (CartItem(user_id=row['recipe__checklist__user'],
+                  ingredient_id=row['ingredient'],
+                  total_amount=row['total'])
+         for row in RecipeIngredient.objects.filter(
+             recipe__checklist__user__isnull=False
+        ).order_by().values(
+             'recipe__checklist__user', 'ingredient'
+        ).annotate(total=Sum('amount')).iterator()),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('foodgram_api', '0008_image_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_amount', models.PositiveIntegerField(default=0, verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to='foodgram_api.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_items', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Ингредиент в покупках',
+                'verbose_name_plural': 'Ингредиенты в покупках',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='cartitem_user_ingredient_unique'),
+        ),
+        migrations.RunPython(fill_cart_items, migrations.RunPython.noop),
+    ]
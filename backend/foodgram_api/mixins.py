@@ -1,6 +1,100 @@
+from hashlib import sha1
+
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import (get_conditional_response,
+                                patch_vary_headers)
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
 from users.validators import validator_username
 
 
 class ValidationMixin:
     def validate_username(self, value):
         return validator_username(value)
+
+
+class PrerenderedListMixin:
+    prerendered_response = None
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        etag, body = self.prerendered_response.get(
+            lambda: self.get_serializer(self.get_queryset(), many=True).data
+        )
+        if_none_match = request.headers.get('If-None-Match', '')
+        if etag in parse_etags(if_none_match) or if_none_match == '*':
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
+class CachedListMixin:
+    """Кэширует общую часть страниц списка и накладывает флаги зрителя."""
+    list_cache = None
+    viewer_filters = ()
+    # Пары (поле ответа, related_name пользователя) с отметками зрителя.
+    viewer_flags = ()
+
+    def list(self, request, *args, **kwargs):
+        if any(name in request.query_params for name in self.viewer_filters):
+            return super().list(request, *args, **kwargs)
+        key = self.list_cache.get_key(request)
+        data = self.list_cache.get(key)
+        if data is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            data = response.data
+            self.list_cache.set(key, data)
+        return Response(self.overlay_viewer_state(data))
+
+    def overlay_viewer_state(self, data):
+        recipes = data['results']
+        user = self.request.user
+        if not recipes:
+            return data
+        recipe_ids = [recipe['id'] for recipe in recipes]
+        for name, related_name in self.viewer_flags:
+            if name not in recipes[0]:
+                continue
+            marked = frozenset()
+            if user.is_authenticated:
+                marked = set(getattr(user, related_name).filter(
+                    recipe_id__in=recipe_ids
+                ).values_list('recipe_id', flat=True))
+            for recipe in recipes:
+                recipe[name] = recipe['id'] in marked
+        return data
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 по ETag, не сериализуя ответ.
+
+    Last-Modified не отдаётся: updated_at рецепта не меняется при правках
+    автора, тегов и ингредиентов, которые учитывает только поколение кэша.
+    """
+
+    def get_viewer_updated_at(self):
+        user = self.request.user
+        return user.state_updated_at if user.is_authenticated else None
+
+    def conditional_response(self, request, get_response, version):
+        viewer_updated_at = self.get_viewer_updated_at()
+        etag = quote_etag(sha1(
+            f'{version}:{request.user.pk}:{viewer_updated_at}'.encode()
+        ).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = get_response()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        response['Cache-Control'] = 'no-cache'
+        patch_vary_headers(response, ('Authorization', ))
+        return response
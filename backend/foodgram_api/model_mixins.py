@@ -0,0 +1,16 @@
+class DerivedFieldsMixin:
+    """Не даёт полному save() перезаписать поля из derived_fields.
+
+    Такие поля меняются только запросами с F(), сигналами и фоновыми
+    задачами, поэтому копия в памяти может быть устаревшей.
+    """
+    derived_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.derived_fields
+            ]
+        super().save(*args, **kwargs)
@@ -4,17 +4,33 @@ from django.core.validators import (MinValueValidator,
 from colorfield.fields import ColorField
 
 from users.models import FoodgramUser
+from .model_mixins import DerivedFieldsMixin
 from .constants import (MIN_INGREDIENT_VALUE,
                         INGREDIENT_VALIDATION_MESSAGE,
                         COOKING_VALIDATION_MESSAGE,
                         MIN_COOKING_VALUE,
                         MAX_NAME_LENGH,
+                        MAX_TAG_BITS,
+                        MAX_STATUS_LENGTH,
                         MAX_COOKING_VALUE,
                         MAX_COOKING_VALIDATION_MESSAGE,
                         MAX_INGREDIENT_VALUE,
                         MAX_INGREDIENT_VALIDATION_MESSAGE)
 
 
+class ImageStatus(models.TextChoices):
+    PENDING = 'pending', 'В очереди'
+    PROCESSING = 'processing', 'Обрабатывается'
+    READY = 'ready', 'Готово'
+    FAILED = 'failed', 'Ошибка'
+
+
+class TombstoneKind(models.TextChoices):
+    RECIPE = 'recipe', 'Рецепт'
+    FAVORITE = 'favorite', 'Избранное'
+    SHOPPING_CART = 'shopping_cart', 'Покупки'
+
+
 class Tag(models.Model):
     name = models.CharField(
         'Название',
@@ -36,6 +52,10 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    @property
+    def bit(self):
+        return 1 << (self.id - 1) if self.id <= MAX_TAG_BITS else None
+
 
 class Ingredient(models.Model):
     name = models.CharField(
@@ -61,7 +81,7 @@ class Ingredient(models.Model):
         return self.name
 
 
-class Recipe(models.Model):
+class Recipe(DerivedFieldsMixin, models.Model):
     name = models.CharField(
         'Название',
         max_length=MAX_NAME_LENGH
@@ -70,6 +90,13 @@ class Recipe(models.Model):
         'Изображение',
         upload_to='images/'
     )
+    image_status = models.CharField(
+        'Обработка изображения',
+        max_length=MAX_STATUS_LENGTH,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        editable=False
+    )
     text = models.TextField(
         'Описание'
     )
@@ -103,11 +130,47 @@ class Recipe(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+    favorites_count = models.PositiveIntegerField(
+        'Добавлено в избранное',
+        default=0,
+        editable=False
+    )
+    in_carts_count = models.PositiveIntegerField(
+        'Добавлено в покупки',
+        default=0,
+        editable=False
+    )
+    tags_mask = models.BigIntegerField(
+        'Битовая маска тегов',
+        default=0,
+        editable=False,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'Рецепты'
         verbose_name_plural = 'Рецепты'
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', '-id']
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+        )
+
+    # Поля, которые меняются только запросами с F(), сигналами
+    # и обработчиком изображений.
+    derived_fields = ('favorites_count', 'in_carts_count', 'tags_mask',
+                      'image_status')
 
     def __str__(self):
         return self.name
@@ -150,6 +213,11 @@ class RecipeUserModel(models.Model):
         related_name='%(class)s',
         verbose_name='Пользователь'
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         abstract = True
@@ -181,3 +249,107 @@ class Favorites(RecipeUserModel):
     def __str__(self):
         return (f'Рецепт {self.recipe.name} добавлен в'
                 f'избранное пользователя {self.user.username}')
+
+
+class CartItem(models.Model):
+    user = models.ForeignKey(
+        FoodgramUser,
+        on_delete=models.CASCADE,
+        related_name='cart_items',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='cart_items',
+        verbose_name='Ингредиент'
+    )
+    total_amount = models.PositiveIntegerField(
+        'Количество',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент в покупках'
+        verbose_name_plural = 'Ингредиенты в покупках'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='cartitem_user_ingredient_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return (f'{self.ingredient.name} ({self.total_amount}) в покупках '
+                f'пользователя {self.user.username}')
+
+
+class Tombstone(models.Model):
+    kind = models.CharField(
+        'Тип',
+        max_length=MAX_STATUS_LENGTH,
+        choices=TombstoneKind.choices
+    )
+    object_id = models.PositiveBigIntegerField('Рецепт')
+    user_id = models.PositiveBigIntegerField(
+        'Пользователь',
+        null=True,
+        blank=True
+    )
+    deleted_at = models.DateTimeField(
+        'Дата удаления',
+        auto_now_add=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Удалённая запись'
+        verbose_name_plural = 'Удалённые записи'
+        indexes = (
+            models.Index(
+                fields=('kind', 'user_id', 'deleted_at'),
+                name='tombstone_kind_user_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.object_id}'
+
+
+class ImageJob(models.Model):
+    image = models.CharField(
+        'Изображение',
+        max_length=MAX_NAME_LENGH,
+        unique=True
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=MAX_STATUS_LENGTH,
+        choices=ImageStatus.choices,
+        default=ImageStatus.PENDING,
+        db_index=True
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Попытки',
+        default=0
+    )
+    error = models.TextField(
+        'Ошибка',
+        blank=True
+    )
+    created = models.DateTimeField(
+        'Создано',
+        auto_now_add=True
+    )
+    updated = models.DateTimeField(
+        'Обновлено',
+        auto_now=True
+    )
+
+    class Meta:
+        verbose_name = 'Обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        ordering = ('id',)
+
+    def __str__(self):
+        return f'{self.image} ({self.get_status_display()})'
@@ -1,6 +1,101 @@
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
 from rest_framework.pagination import PageNumberPagination as pg
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class PageNumberPagination(pg):
     page_size_query_param = 'limit'
     page_size = 6
+
+
+class RecipeCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    page_size = 6
+    ordering = ('-pub_date', '-id')
+
+    def decode_cursor(self, request):
+        if not request.query_params.get(self.cursor_query_param):
+            return None
+        return super().decode_cursor(request)
+
+
+class RecipePagination(PageNumberPagination):
+    cursor_pagination_class = RecipeCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.cursor_pagination_class.cursor_query_param in (
+            request.query_params
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class FeedPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = 6
+    max_page_size = 100
+    invalid_cursor_message = 'Неверный курсор'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            pub_date, recipe_id = b64decode(
+                encoded.encode('ascii'), altchars=b'-_', validate=True
+            ).decode('ascii').split(' ')
+            return datetime.fromisoformat(pub_date), int(recipe_id)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        pub_date, recipe_id = position
+        encoded = b64encode(f'{pub_date.isoformat()} {recipe_id}'.encode(
+            'ascii'
+        ), altchars=b'-_').decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param,
+                                   encoded)
+
+    def paginate_keys(self, load_keys, request):
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        keys = load_keys(self.decode_cursor(request), page_size + 1)
+        self.next_position = (keys[page_size - 1] if len(keys) > page_size
+                              else None)
+        return keys[:page_size]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
@@ -0,0 +1,70 @@
+import csv
+import json
+from collections.abc import Mapping
+
+from rest_framework.renderers import BaseRenderer
+
+
+class EchoBuffer:
+    def write(self, value):
+        return value
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, Mapping):
+            return '\n'.join(
+                f'{key}: {value}' for key, value in data.items()
+            ).encode(self.charset)
+        return b''.join(self.stream(data))
+
+    def stream(self, ingredients):
+        for chunk in self.render_rows(ingredients):
+            yield chunk.encode(self.charset)
+
+    def render_rows(self, ingredients):
+        for ingredient in ingredients:
+            yield (f'{ingredient["ingredient__name"]}, '
+                   f'{ingredient["total_amount"]}, '
+                   f'{ingredient["ingredient__measurement_unit"]}\n')
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_rows(self, ingredients):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(('name', 'amount', 'measurement_unit'))
+        for ingredient in ingredients:
+            yield writer.writerow((ingredient['ingredient__name'],
+                                   ingredient['total_amount'],
+                                   ingredient['ingredient__measurement_unit']))
+
+
+class ShoppingCartJSONRenderer(ShoppingCartRenderer):
+    media_type = 'application/json'
+    format = 'json'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, Mapping):
+            return json.dumps(data, ensure_ascii=False).encode(self.charset)
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def render_rows(self, ingredients):
+        separator = '['
+        for ingredient in ingredients:
+            yield separator + json.dumps({
+                'name': ingredient['ingredient__name'],
+                'amount': ingredient['total_amount'],
+                'measurement_unit': ingredient['ingredient__measurement_unit']
+            }, ensure_ascii=False)
+            separator = ',\n'
+        yield ']\n' if separator != '[' else '[]\n'
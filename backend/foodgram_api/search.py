@@ -0,0 +1,322 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from datetime import timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import (BigIntegerField, F, FloatField, OuterRef,
+                              Subquery, Sum, Value)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from .cache import CacheGeneration
+from .constants import MAX_TAG_BITS, SYNC_OVERLAP_SECONDS
+from .models import (Ingredient, Recipe, RecipeIngredient, Tag,
+                     TombstoneKind)
+from .sync import get_deleted_ids, in_window, is_sync_token_expired
+
+RECIPE_TABLE = Recipe._meta.db_table
+RECIPE_FTS_TABLE = f'{RECIPE_TABLE}_fts'
+SEARCH_CONFIG = 'russian'
+# Веса колонок name и text для bm25: как A и B в PostgreSQL.
+SQLITE_SEARCH_WEIGHTS = '10.0, 1.0'
+
+POSTGRESQL_SEARCH_SCHEMA = (
+    f'ALTER TABLE {RECIPE_TABLE} '
+    'ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    f'''CREATE OR REPLACE FUNCTION {RECIPE_TABLE}_search_vector()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}',
+                                  coalesce(NEW.text, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql''',
+    f'DROP TRIGGER IF EXISTS {RECIPE_TABLE}_search_vector '
+    f'ON {RECIPE_TABLE}',
+    f'CREATE TRIGGER {RECIPE_TABLE}_search_vector '
+    f'BEFORE INSERT OR UPDATE OF name, text ON {RECIPE_TABLE} '
+    f'FOR EACH ROW EXECUTE PROCEDURE {RECIPE_TABLE}_search_vector()',
+    f'UPDATE {RECIPE_TABLE} SET name = name WHERE search_vector IS NULL',
+    f'CREATE INDEX IF NOT EXISTS {RECIPE_TABLE}_search_vector_idx '
+    f'ON {RECIPE_TABLE} USING GIN (search_vector)',
+)
+
+SQLITE_SEARCH_TRIGGERS = (
+    f'''CREATE TRIGGER IF NOT EXISTS {RECIPE_FTS_TABLE}_insert
+    AFTER INSERT ON {RECIPE_TABLE} BEGIN
+        INSERT INTO {RECIPE_FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {RECIPE_FTS_TABLE}_delete
+    AFTER DELETE ON {RECIPE_TABLE} BEGIN
+        INSERT INTO {RECIPE_FTS_TABLE}({RECIPE_FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {RECIPE_FTS_TABLE}_update
+    AFTER UPDATE OF name, text ON {RECIPE_TABLE} BEGIN
+        INSERT INTO {RECIPE_FTS_TABLE}({RECIPE_FTS_TABLE}, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO {RECIPE_FTS_TABLE}(rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END''',
+)
+
+
+def ensure_recipe_search_schema(using_connection):
+    with using_connection.cursor() as cursor:
+        if using_connection.vendor == 'postgresql':
+            for statement in POSTGRESQL_SEARCH_SCHEMA:
+                cursor.execute(statement)
+        elif using_connection.vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {RECIPE_FTS_TABLE} '
+                f'USING fts5(name, text, content={RECIPE_TABLE}, '
+                "content_rowid=id, tokenize='unicode61')"
+            )
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+                'AND tbl_name = %s', (RECIPE_TABLE,)
+            )
+            triggers = cursor.fetchone()[0]
+            for statement in SQLITE_SEARCH_TRIGGERS:
+                cursor.execute(statement)
+            if triggers < len(SQLITE_SEARCH_TRIGGERS):
+                cursor.execute(
+                    f'INSERT INTO {RECIPE_FTS_TABLE}({RECIPE_FTS_TABLE}) '
+                    "VALUES ('rebuild')"
+                )
+
+
+def search_recipes(queryset, query):
+    terms = re.findall(r'\w+', query.casefold())
+    if not terms:
+        return queryset
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT id FROM {RECIPE_TABLE} WHERE search_vector @@ '
+            f"to_tsquery('{SEARCH_CONFIG}', %s)", (tsquery,)
+        )).annotate(search_rank=RawSQL(
+            f'ts_rank({RECIPE_TABLE}.search_vector, '
+            f"to_tsquery('{SEARCH_CONFIG}', %s))", (tsquery,),
+            output_field=FloatField()
+        ))
+    elif connection.vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        queryset = queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {RECIPE_FTS_TABLE} '
+            f'WHERE {RECIPE_FTS_TABLE} MATCH %s', (match,)
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({RECIPE_FTS_TABLE}, {SQLITE_SEARCH_WEIGHTS}) '
+            f'FROM {RECIPE_FTS_TABLE} '
+            f'WHERE {RECIPE_FTS_TABLE} MATCH %s '
+            f'AND {RECIPE_FTS_TABLE}.rowid = {RECIPE_TABLE}.id', (match,),
+            output_field=FloatField()
+        ))
+    else:
+        for term in terms:
+            queryset = queryset.filter(name__icontains=term)
+        return queryset
+    return queryset.order_by('-search_rank', *Recipe._meta.ordering)
+
+
+class IngredientIndex:
+    """Снимок ингредиентов для автодополнения без запросов к БД.
+
+    Снимок привязан к поколению в общем кэше, поэтому изменения из других
+    процессов видны после сброса поколения или смены окна таймаута.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._snapshot = None
+        self.generation = CacheGeneration(
+            'ingredient-index', settings.PRERENDERED_RESPONSE_TIMEOUT
+        )
+
+    def invalidate(self):
+        self._snapshot = None
+        self.generation.invalidate()
+
+    def load(self):
+        generation = self.generation.get_generation()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == generation:
+            return snapshot[1:]
+        with self._lock:
+            if self._snapshot is None or self._snapshot[0] != generation:
+                entries = sorted(
+                    (name.casefold(), name, pk, measurement_unit)
+                    for pk, name, measurement_unit
+                    in Ingredient.objects.values_list(
+                        'id', 'name', 'measurement_unit'
+                    ).iterator()
+                )
+                self._snapshot = (
+                    generation,
+                    [entry[0] for entry in entries],
+                    [
+                        Ingredient(id=pk, name=name,
+                                   measurement_unit=measurement_unit)
+                        for _, name, pk, measurement_unit in entries
+                    ]
+                )
+            return self._snapshot[1:]
+
+    def search(self, query):
+        keys, ingredients = self.load()
+        query = query.casefold()
+        start = end = bisect_left(keys, query)
+        while end < len(keys) and keys[end].startswith(query):
+            end += 1
+        contains = [
+            ingredients[position]
+            for position, key in enumerate(keys)
+            if (position < start or position >= end) and query in key
+        ]
+        return ingredients[start:end] + contains
+
+
+class RecipeIngredientIndex:
+    """Инвертированный индекс: ингредиент -> отсортированные id рецептов.
+
+    Изменения из других процессов подтягиваются по updated_at рецептов
+    и надгробиям удалённых рецептов, как в дельта-синхронизации.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._postings = None
+        self._recipes = None
+        self._since = None
+        self._dirty = set()
+
+    def invalidate(self):
+        with self._lock:
+            self._postings = None
+
+    def mark_dirty(self, recipe_id):
+        with self._lock:
+            self._dirty.add(recipe_id)
+
+    def load(self):
+        with self._lock:
+            until = timezone.now()
+            if self._postings is None or is_sync_token_expired(self._since):
+                postings = defaultdict(lambda: array('q'))
+                recipes = defaultdict(set)
+                rows = RecipeIngredient.objects.order_by('recipe_id')
+                for recipe_id, ingredient_id in rows.values_list(
+                    'recipe_id', 'ingredient_id'
+                ).iterator():
+                    postings[ingredient_id].append(recipe_id)
+                    recipes[recipe_id].add(ingredient_id)
+                self._postings, self._recipes = postings, recipes
+                self._dirty.clear()
+            else:
+                changed = self._dirty | set(Recipe.objects.filter(
+                    in_window('updated_at', self._since, until)
+                ).values_list('id', flat=True))
+                changed.update(get_deleted_ids(
+                    TombstoneKind.RECIPE, self._since, until
+                ))
+                if changed:
+                    self.refresh(changed)
+                self._dirty = set()
+            self._since = until - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+            return self._postings, self._recipes
+
+    def refresh(self, recipe_ids):
+        current = defaultdict(set)
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            current[recipe_id].add(ingredient_id)
+        for recipe_id in recipe_ids:
+            old = self._recipes.pop(recipe_id, set())
+            new = current.get(recipe_id, set())
+            for ingredient_id in old - new:
+                posting = self._postings[ingredient_id]
+                del posting[bisect_left(posting, recipe_id)]
+            for ingredient_id in new - old:
+                insort(self._postings[ingredient_id], recipe_id)
+            if new:
+                self._recipes[recipe_id] = new
+
+    def rank(self, ingredient_ids):
+        postings, recipes = self.load()
+        matches = Counter()
+        for ingredient_id in set(ingredient_ids):
+            matches.update(postings.get(ingredient_id, ()))
+        ranked = [
+            (recipe_id, matched / len(recipes[recipe_id]))
+            for recipe_id, matched in matches.items()
+        ]
+        ranked.sort(key=lambda item: (-item[1], -item[0]))
+        return ranked
+
+
+class TagMaskIndex:
+    def __init__(self):
+        self._bits = None
+
+    def invalidate(self):
+        self._bits = None
+
+    def load(self):
+        bits = self._bits
+        if bits is None:
+            bits = self._bits = {
+                tag.slug: tag.bit for tag in Tag.objects.only('id', 'slug')
+            }
+        return bits
+
+    def filter(self, queryset, slugs):
+        bits = self.load()
+        missing = [slug for slug in slugs if slug not in bits]
+        if missing:
+            bits.update({
+                tag.slug: tag.bit
+                for tag in Tag.objects.filter(
+                    slug__in=missing
+                ).only('id', 'slug')
+            })
+        if any(bits.get(slug, 0) is None for slug in slugs):
+            return queryset.filter(tags__slug__in=slugs).distinct()
+        mask = 0
+        for slug in slugs:
+            mask |= bits.get(slug) or 0
+        if not mask:
+            return queryset.filter(tags__slug__in=slugs).distinct()
+        return queryset.alias(
+            tags_match=F('tags_mask').bitand(mask)
+        ).filter(tags_match__gt=0)
+
+
+def update_tags_mask(recipes):
+    RecipeTag = Recipe.tags.through
+    recipes.update(tags_mask=Coalesce(Subquery(
+        RecipeTag.objects.filter(
+            recipe=OuterRef('pk'), tag_id__lte=MAX_TAG_BITS
+        ).order_by().values('recipe').annotate(
+            mask=Sum(
+                Cast(Value(1), BigIntegerField()).bitleftshift(
+                    F('tag_id') - 1
+                ),
+                output_field=BigIntegerField()
+            )
+        ).values('mask')
+    ), 0))
+
+
+ingredient_index = IngredientIndex()
+tag_mask_index = TagMaskIndex()
+recipe_ingredient_index = RecipeIngredientIndex()
@@ -1,13 +1,61 @@
+from functools import partial
+
+from django import forms
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from drf_extra_fields.fields import Base64ImageField as DRF_Base64ImageField
 
-from .models import (Tag, Ingredient, Favorites,
+from .models import (Tag, Ingredient, Favorites, CartItem,
                      Recipe, CheckList, RecipeIngredient)
 from users.models import FoodgramUser, Follow
+from .cart import batch_cart_refresh, get_cart_users, refresh_cart_totals
 from .constants import MIN_INGREDIENT_VALUE, MAX_INGREDIENT_VALUE
+from .images import (enqueue_image, get_variant_urls, save_original,
+                     sync_image_status)
+from .search import recipe_ingredient_index
+
+
+def get_query_list(request, name):
+    if request is None or name not in request.query_params:
+        return None
+    return frozenset(
+        value.strip() for value in request.query_params[name].split(',')
+        if value.strip()
+    )
 
 
-class UserSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """Оставляет в корневом сериализаторе поля из ?fields=.
+
+    Вложенные объекты из compact_fields отдаются как id, если их нет
+    в ?expand=; id возвращается всегда.
+    """
+    compact_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        parent = self.parent
+        if isinstance(parent, serializers.ListSerializer):
+            parent = parent.parent
+        request = self.context.get('request')
+        requested = get_query_list(request, 'fields')
+        if parent is not None or requested is None:
+            return fields
+        expanded = get_query_list(request, 'expand') or frozenset()
+        return {
+            name: (self.compact_fields[name]()
+                   if name in self.compact_fields and name not in expanded
+                   else field)
+            for name, field in fields.items()
+            if name == 'id' or name in requested
+        }
+
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -15,21 +63,71 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('email', 'id', 'username',
                   'first_name', 'last_name', 'is_subscribed')
 
-    def get_is_subscribed(self, obj):
+    def get_subscriptions(self):
         request = self.context.get('request')
-        return request and (
-            (
-                request.user.is_authenticated
-            ) and (
-                request.user.subscriber.filter(recipe_owner=obj).exists()
+        if not (request and request.user.is_authenticated):
+            return frozenset()
+        if not hasattr(request, 'viewer_subscriptions'):
+            request.viewer_subscriptions = frozenset(
+                request.user.subscriber.values_list('recipe_owner_id',
+                                                    flat=True)
             )
-        )
+        return request.viewer_subscriptions
+
+    def get_is_subscribed(self, obj):
+        return obj.id in self.get_subscriptions()
+
+
+def resolve_pks(queryset, pks):
+    objects = queryset.in_bulk(set(pks))
+    return objects, [pk for pk in pks if pk not in objects]
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        pk_field = child.get_queryset().model._meta.pk
+        pks = []
+        for pk in data:
+            try:
+                pks.append(pk_field.to_python(pk))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(pk).__name__)
+        objects, missing = resolve_pks(child.get_queryset(), pks)
+        if missing:
+            child.fail('does_not_exist',
+                       pk_value=', '.join(str(pk) for pk in missing))
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
 
 
 class Base64ImageField(DRF_Base64ImageField):
 
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('_DjangoImageField', forms.FileField)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        return save_original(super().to_internal_value(data))
+
     def to_representation(self, image):
-        return image.url
+        view = self.context.get('view')
+        variant = ('thumbnail' if view and view.action in ('list', 'feed')
+                   else 'detail')
+        return get_variant_urls(image)[variant]
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -60,8 +158,15 @@ class GetIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    compact_fields = {
+        'author': partial(serializers.PrimaryKeyRelatedField,
+                          read_only=True),
+        'tags': partial(serializers.PrimaryKeyRelatedField,
+                        many=True, read_only=True),
+    }
     image = Base64ImageField()
+    image_variants = serializers.SerializerMethodField()
     tags = TagSerializer(many=True)
     author = UserSerializer(read_only=True)
     ingredients = GetIngredientSerializer(many=True,
@@ -74,33 +179,79 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'tags',
                   'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart',
-                  'name', 'image',
+                  'name', 'image', 'image_variants', 'image_status',
                   'text', 'cooking_time')
 
-    def get_is_favorited(self, obj):
+    def get_viewer_state(self, obj, name, related_name):
+        if hasattr(obj, name):
+            return getattr(obj, name)
         request = self.context.get('request')
-        return (
+        return bool(
             request and (
                 request.user.is_authenticated
             ) and (
-                request.user.favorites.filter(recipe=obj).exists()
+                getattr(request.user, related_name).filter(
+                    recipe=obj
+                ).exists()
             )
         )
 
+    def get_image_variants(self, obj):
+        return get_variant_urls(obj.image)
+
+    def get_is_favorited(self, obj):
+        return self.get_viewer_state(obj, 'is_favorited', 'favorites')
+
     def get_is_in_shopping_cart(self, obj):
-        request = self.context.get('request')
-        return (
-            request and (
-                request.user.is_authenticated
-            ) and (
-                request.user.checklist.filter(recipe=obj).exists()
-            )
+        return self.get_viewer_state(obj, 'is_in_shopping_cart',
+                                     'checklist')
+
+
+class CartItemSerializer(serializers.ModelSerializer):
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+    amount = serializers.ReadOnlyField(source='total_amount')
+
+    class Meta:
+        model = CartItem
+        fields = ('id', 'name', 'measurement_unit', 'amount')
+
+
+class CoverageRecipeSerializer(RecipeSerializer):
+    coverage = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('coverage',)
+
+
+class CreateIngredientListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        ingredients_data = super().to_internal_value(data)
+        objects, missing = resolve_pks(
+            Ingredient.objects.all(),
+            [ingredient['id'] for ingredient in ingredients_data]
         )
+        if missing:
+            message = self.child.fields['id'].error_messages['does_not_exist']
+            raise serializers.ValidationError([
+                {'id': [message.format(pk_value=ingredient['id'])]}
+                if ingredient['id'] in missing else {}
+                for ingredient in ingredients_data
+            ])
+        for ingredient in ingredients_data:
+            ingredient['id'] = objects[ingredient['id']]
+        return ingredients_data
 
 
 class CreateIngredientSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all()
+    id = serializers.IntegerField(
+        error_messages={
+            'does_not_exist': serializers.PrimaryKeyRelatedField
+            .default_error_messages['does_not_exist']
+        }
     )
     amount = serializers.IntegerField(write_only=True,
                                       min_value=MIN_INGREDIENT_VALUE,
@@ -109,14 +260,15 @@ class CreateIngredientSerializer(serializers.ModelSerializer):
     class Meta:
         model = RecipeIngredient
         fields = ('id', 'amount')
+        list_serializer_class = CreateIngredientListSerializer
 
 
 class CreateRecipeSerializer(serializers.ModelSerializer):
-    image = DRF_Base64ImageField(max_length=None,
-                                 allow_null=False, allow_empty_file=False)
-    tags = serializers.PrimaryKeyRelatedField(many=True,
-                                              required=True,
-                                              queryset=Tag.objects.all())
+    image = Base64ImageField(max_length=None,
+                             allow_null=False, allow_empty_file=False)
+    tags = BulkPrimaryKeyRelatedField(many=True,
+                                      required=True,
+                                      queryset=Tag.objects.all())
     author = UserSerializer(read_only=True)
     ingredients = CreateIngredientSerializer(many=True, required=True)
 
@@ -136,6 +288,37 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             for ingredient in ingredients_data
         ]
         RecipeIngredient.objects.bulk_create(recipe_ingredients)
+        recipe_ingredient_index.mark_dirty(recipe.id)
+
+    @classmethod
+    def update_ingredients(cls, recipe, ingredients_data):
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipeingredient.all()
+        }
+        to_create = []
+        to_update = []
+        for ingredient in ingredients_data:
+            recipe_ingredient = current.pop(ingredient['id'].pk, None)
+            if recipe_ingredient is None:
+                to_create.append(ingredient)
+            elif recipe_ingredient.amount != ingredient['amount']:
+                recipe_ingredient.amount = ingredient['amount']
+                to_update.append(recipe_ingredient)
+        if current:
+            with batch_cart_refresh(recipe.id):
+                RecipeIngredient.objects.filter(
+                    pk__in=[item.pk for item in current.values()]
+                ).delete()
+        if to_update:
+            RecipeIngredient.objects.bulk_update(to_update, ('amount',))
+        if to_create:
+            cls.create_ingredients(recipe, to_create)
+        recipe_ingredient_index.mark_dirty(recipe.id)
+        changed = [*current, *(item.ingredient_id for item in to_update),
+                   *(ingredient['id'].pk for ingredient in to_create)]
+        if changed:
+            refresh_cart_totals(get_cart_users(recipe.id), changed)
 
     def validate_image(self, value):
         if not value:
@@ -172,24 +355,44 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients')
         tags_data = validated_data.pop('tags')
+        validated_data['image_status'] = enqueue_image(
+            validated_data['image']
+        )
 
         recipe = Recipe.objects.create(author=self.context['request'].user,
                                        **validated_data)
         recipe.tags.set(tags_data)
 
         self.create_ingredients(recipe, ingredients_data)
+        transaction.on_commit(
+            partial(sync_image_status, recipe.id, recipe.image.name)
+        )
 
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         ingredients_data = validated_data.pop('ingredients')
-
-        instance.ingredients.clear()
-        self.create_ingredients(instance, ingredients_data)
-        return super().update(instance, validated_data)
+        tags_data = validated_data.pop('tags')
+        image_changed = validated_data.get(
+            'image', instance.image.name
+        ) != instance.image.name
+
+        self.update_ingredients(instance, ingredients_data)
+        instance.tags.set(tags_data)
+        instance.refresh_from_db(fields=('tags_mask', ))
+        instance = super().update(instance, validated_data)
+        if image_changed:
+            instance.image_status = enqueue_image(instance.image.name)
+            instance.save(update_fields=('image_status', ))
+            transaction.on_commit(
+                partial(sync_image_status, instance.id, instance.image.name)
+            )
+        return instance
 
     def to_representation(self, instance):
         return RecipeSerializer(instance=instance,
@@ -267,7 +470,7 @@ class FavoritesSerializer(BaseRecipeActionSerializer):
 
 class ReturnRecipesCountSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='recipes.count')
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = FoodgramUser
@@ -275,15 +478,43 @@ class ReturnRecipesCountSerializer(UserSerializer):
             ['recipes', 'recipes_count']
         )
 
+    @staticmethod
+    def get_recipes_limit(request):
+        try:
+            recipes_limit = int(request.query_params.get('recipes_limit'))
+        except (ValueError, TypeError):
+            return None
+        return recipes_limit if recipes_limit >= 0 else None
+
+    @classmethod
+    def prefetch_recipes(cls, authors, request):
+        recipes_limit = cls.get_recipes_limit(request)
+        recipes = Recipe.objects.filter(
+            author__in=authors
+        ).only('id', 'name', 'image', 'cooking_time', 'author_id')
+        if recipes_limit is not None:
+            ranked = recipes.annotate(
+                recipe_rank=Window(
+                    expression=RowNumber(),
+                    partition_by=F('author_id'),
+                    order_by=(F('pub_date').desc(), F('id').desc()),
+                )
+            ).values('id', 'name', 'image', 'cooking_time',
+                     'author_id', 'recipe_rank')
+            sql, params = ranked.query.sql_with_params()
+            recipes = Recipe.objects.raw(
+                f'SELECT * FROM ({sql}) ranked '
+                'WHERE ranked.recipe_rank <= %s '
+                'ORDER BY ranked.recipe_rank',
+                (*params, recipes_limit)
+            )
+        previews = {author.id: [] for author in authors}
+        for recipe in recipes:
+            previews[recipe.author_id].append(recipe)
+        for author in authors:
+            author.recipes_preview = previews[author.id]
+
     def get_recipes(self, obj):
-        recipes_limit = self.context['request'].query_params.get(
-            'recipes_limit'
-        )
-        recipes = obj.recipes.all()
-        if recipes_limit:
-            try:
-                recipes_limit = int(recipes_limit)
-            except (ValueError, TypeError):
-                recipes_limit = None
-            recipes = recipes[:recipes_limit]
-        return RecipeReturnSerializer(recipes, many=True).data
+        if not hasattr(obj, 'recipes_preview'):
+            self.prefetch_recipes([obj], self.context['request'])
+        return RecipeReturnSerializer(obj.recipes_preview, many=True).data
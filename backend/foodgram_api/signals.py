@@ -0,0 +1,185 @@
+from django.db.models import F
+from django.db import connections
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from users.models import FoodgramUser, Follow
+from .cart import (add_recipe_to_cart, batched_recipes, get_cart_users,
+                   refresh_cart_totals)
+from .cache import ingredients_response, recipe_list_cache, tags_response
+from .models import (CheckList, Favorites, Ingredient, Recipe,
+                     RecipeIngredient, Tag, Tombstone, TombstoneKind)
+from .search import (ensure_recipe_search_schema, ingredient_index,
+                     recipe_ingredient_index, tag_mask_index,
+                     update_tags_mask)
+
+RECIPE_COUNTERS = {
+    Favorites: 'favorites_count',
+    CheckList: 'in_carts_count',
+}
+
+
+def change_counter(model, pk, field, delta):
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    queryset.update(**{field: F(field) + delta})
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(sender, **kwargs):
+    ingredient_index.invalidate()
+    ingredients_response.invalidate()
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    tags_response.invalidate()
+    tag_mask_index.invalidate()
+
+
+@receiver(post_delete, sender=Tag)
+def remove_tag_bit(sender, instance, **kwargs):
+    if instance.bit:
+        Recipe.objects.filter(
+            tags_mask__gt=0
+        ).update(tags_mask=F('tags_mask').bitand(~instance.bit))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def sync_tags_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_tags_mask(Recipe.objects.filter(pk=instance.pk))
+    elif pk_set:
+        update_tags_mask(Recipe.objects.filter(pk__in=pk_set))
+    else:
+        update_tags_mask(Recipe.objects.filter(
+            tags_mask__gt=0
+        ))
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(FoodgramUser, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    change_counter(FoodgramUser, instance.author_id, 'recipes_count', -1)
+    recipe_ingredient_index.mark_dirty(instance.id)
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_cart_users(sender, instance, **kwargs):
+    # Каскад удаляет строки состава и CheckList раньше самого рецепта;
+    # покупки пересчитываются один раз в post_delete рецепта.
+    instance.cart_users = get_cart_users(instance.id)
+    batched_recipes.ids.add(instance.id)
+
+
+@receiver(post_delete, sender=Recipe)
+def refresh_deleted_recipe_carts(sender, instance, **kwargs):
+    batched_recipes.ids.discard(instance.id)
+    if getattr(instance, 'cart_users', None):
+        refresh_cart_totals(user_ids=instance.cart_users)
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def update_recipe_ingredient_index(sender, instance, **kwargs):
+    recipe_ingredient_index.mark_dirty(instance.recipe_id)
+    if instance.recipe_id in batched_recipes.ids:
+        return
+    cart_users = get_cart_users(instance.recipe_id)
+    if cart_users:
+        refresh_cart_totals(cart_users, [instance.ingredient_id])
+
+
+@receiver(post_save, sender=CheckList)
+def add_to_cart_totals(sender, instance, created, **kwargs):
+    if created and instance.user_id:
+        add_recipe_to_cart(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=CheckList)
+def remove_from_cart_totals(sender, instance, **kwargs):
+    if instance.user_id and instance.recipe_id not in batched_recipes.ids:
+        add_recipe_to_cart(instance.user_id, instance.recipe_id, sign=-1)
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_save, sender=CheckList)
+def increment_recipe_counter(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id,
+                       RECIPE_COUNTERS[sender], 1)
+
+
+@receiver(post_delete, sender=Favorites)
+@receiver(post_delete, sender=CheckList)
+def decrement_recipe_counter(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, RECIPE_COUNTERS[sender], -1)
+
+
+@receiver((post_save, post_delete), sender=Favorites)
+@receiver((post_save, post_delete), sender=CheckList)
+@receiver((post_save, post_delete), sender=Follow)
+def touch_viewer_state(sender, instance, **kwargs):
+    user_id = (instance.subscriber_id if sender is Follow
+               else instance.user_id)
+    FoodgramUser.objects.filter(pk=user_id).update(
+        state_updated_at=timezone.now()
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def create_recipe_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(kind=TombstoneKind.RECIPE, object_id=instance.id)
+
+
+@receiver(post_delete, sender=Favorites)
+@receiver(post_delete, sender=CheckList)
+def create_viewer_tombstone(sender, instance, **kwargs):
+    if instance.user_id:
+        Tombstone.objects.create(
+            kind=(TombstoneKind.FAVORITE if sender is Favorites
+                  else TombstoneKind.SHOPPING_CART),
+            object_id=instance.recipe_id,
+            user_id=instance.user_id
+        )
+
+
+@receiver(post_save, sender=Follow)
+def increment_followers_count(sender, instance, created, **kwargs):
+    if created:
+        change_counter(FoodgramUser, instance.recipe_owner_id,
+                       'followers_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def decrement_followers_count(sender, instance, **kwargs):
+    change_counter(FoodgramUser, instance.recipe_owner_id,
+                   'followers_count', -1)
+
+
+@receiver((post_save, post_delete), sender=Recipe)
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_list(sender, **kwargs):
+    recipe_list_cache.invalidate()
+
+
+@receiver(post_save, sender=FoodgramUser)
+def invalidate_author_recipes(sender, instance, update_fields, **kwargs):
+    if update_fields is None or set(update_fields) - {'last_login'}:
+        recipe_list_cache.invalidate()
+
+
+def create_recipe_search_schema(sender, using, **kwargs):
+    ensure_recipe_search_schema(connections[using])
@@ -0,0 +1,95 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .constants import (SYNC_OVERLAP_SECONDS, SYNC_PAGE_SIZE,
+                        SYNC_TOMBSTONE_DAYS)
+from .models import CheckList, Favorites, Tombstone, TombstoneKind
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+VIEWER_COLLECTIONS = (
+    ('favorites', Favorites, TombstoneKind.FAVORITE),
+    ('shopping_cart', CheckList, TombstoneKind.SHOPPING_CART),
+)
+
+
+def encode_sync_token(moment):
+    return urlsafe_b64encode(
+        str((moment - EPOCH) // MICROSECOND).encode('ascii')
+    ).decode('ascii')
+
+
+def decode_sync_token(token):
+    return EPOCH + MICROSECOND * int(
+        urlsafe_b64decode(token.encode('ascii')).decode('ascii')
+    )
+
+
+def is_sync_token_expired(since):
+    return since < timezone.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+
+
+def in_window(field, since, until):
+    lookups = {f'{field}__lte': until}
+    if since is not None:
+        lookups[f'{field}__gt'] = since
+    return Q(**lookups)
+
+
+def get_sync_window(recipes, since):
+    """Возвращает (until, has_more) для не более SYNC_PAGE_SIZE рецептов.
+
+    Рецепты с одинаковым updated_at на границе попадают в окно целиком.
+    """
+    until = timezone.now()
+    boundary = list(recipes.filter(
+        in_window('updated_at', since, until)
+    ).order_by('updated_at').values_list(
+        'updated_at', flat=True
+    )[SYNC_PAGE_SIZE - 1:SYNC_PAGE_SIZE + 1])
+    if len(boundary) > 1:
+        return boundary[0], True
+    return until, False
+
+
+def get_deleted_ids(kind, since, until, **lookups):
+    return Tombstone.objects.filter(
+        in_window('deleted_at', since, until), kind=kind, **lookups
+    ).values_list('object_id', flat=True).distinct()
+
+
+def get_changes(recipes, user, since):
+    """Собирает изменения каталога и списков зрителя после since.
+
+    Следующий токен немного отступает назад, чтобы не потерять строки
+    из транзакций, закоммиченных позже чтения; клиент применяет
+    изменения идемпотентно.
+    """
+    until, has_more = get_sync_window(recipes, since)
+    next_since = until
+    if not has_more:
+        next_since -= timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    changes = {
+        'token': encode_sync_token(next_since),
+        'has_more': has_more,
+        'recipes': recipes.filter(
+            in_window('updated_at', since, until)
+        ).order_by('updated_at', 'id'),
+        'deleted': list(get_deleted_ids(TombstoneKind.RECIPE, since, until)),
+    }
+    if not user.is_authenticated:
+        return changes
+    for name, model, kind in VIEWER_COLLECTIONS:
+        current = model.objects.filter(user=user)
+        changes[name] = {
+            'added': list(current.filter(
+                in_window('created', since, until)
+            ).values_list('recipe_id', flat=True)),
+            'removed': list(get_deleted_ids(
+                kind, since, until, user_id=user.id
+            ).exclude(object_id__in=current.values('recipe_id'))),
+        }
+    return changes
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import SimpleRouter
 
@@ -6,6 +7,7 @@ from .views import (
     IngredientViewSet,
     RecipeViewSet,
     FoodgramUserViewSet,
+    metrics,
 )
 
 s_router_v1 = SimpleRouter()
@@ -26,3 +28,6 @@ urlpatterns = [
     path('', include(s_router_v1.urls)),
     path('auth/', include('djoser.urls.authtoken')),
 ]
+
+if settings.QUERY_METRICS:
+    urlpatterns.append(path('_metrics', metrics, name='metrics'))
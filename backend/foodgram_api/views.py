@@ -1,18 +1,26 @@
+import binascii
+from functools import partial
+
 from djoser.views import UserViewSet
-from django.http import FileResponse
-from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.viewsets import ReadOnlyModelViewSet, ModelViewSet
-from rest_framework.permissions import (IsAuthenticatedOrReadOnly,
+from rest_framework.permissions import (IsAdminUser,
+                                        IsAuthenticatedOrReadOnly,
                                         IsAuthenticated)
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 
 from .models import (Tag, Ingredient, Recipe,
-                     CheckList, Favorites, RecipeIngredient)
+                     CheckList, Favorites)
 from users.models import FoodgramUser
+from .search import recipe_ingredient_index
+from .sync import decode_sync_token, get_changes, is_sync_token_expired
 from .serializers import (TagSerializer,
+                          CartItemSerializer,
+                          CoverageRecipeSerializer,
                           IngredientSerializer,
                           RecipeSerializer,
                           FollowSerializer,
@@ -20,33 +28,115 @@ from .serializers import (TagSerializer,
                           UserSerializer,
                           FavoritesSerializer,
                           CreateRecipeSerializer,
-                          CheckListSerializer)
-from .pagination import PageNumberPagination
+                          CheckListSerializer,
+                          get_query_list)
+from .cache import ingredients_response, recipe_list_cache, tags_response
+from .middleware import registry
+from .mixins import (CachedListMixin, ConditionalGetMixin,
+                     PrerenderedListMixin)
+from .feed import get_feed_keys
+from .pagination import (FeedPagination, PageNumberPagination,
+                         RecipePagination)
 from .permissions import IsAuthorOrReadOnly
+from .renderers import (ShoppingCartCSVRenderer,
+                        ShoppingCartJSONRenderer,
+                        ShoppingCartTextRenderer)
 from .filters import IngredientSearchFilter, RecipeFilter
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(PrerenderedListMixin, ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    prerendered_response = tags_response
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(PrerenderedListMixin, ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    prerendered_response = ingredients_response
     filter_backends = (IngredientSearchFilter, )
     search_fields = ('^name', )
 
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.select_related('author').prefetch_related(
-        'tags', 'ingredients').all()
-    pagination_class = PageNumberPagination
+class RecipeViewSet(ConditionalGetMixin, CachedListMixin, ModelViewSet):
+    queryset = Recipe.objects.all()
+    pagination_class = RecipePagination
+    list_cache = recipe_list_cache
+    viewer_filters = ('is_favorited', 'is_in_shopping_cart')
+    viewer_flags = (('is_favorited', 'favorites'),
+                    ('is_in_shopping_cart', 'checklist'))
     permission_classes = (IsAuthorOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
     http_method_names = ('get', 'post', 'patch', 'delete')
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = get_query_list(self.request, 'fields')
+        expanded = get_query_list(self.request, 'expand') or frozenset()
+
+        def requested(name):
+            return fields is None or name in fields
+
+        if requested('author') and (fields is None or 'author' in expanded):
+            queryset = queryset.select_related('author')
+        if requested('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if requested('ingredients'):
+            queryset = queryset.prefetch_related(
+                'recipeingredient__ingredient'
+            )
+        if not requested('text'):
+            queryset = queryset.defer('text')
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(**{
+            name: Exists(model.objects.filter(user=user,
+                                              recipe=OuterRef('pk')))
+            for name, model in (('is_favorited', Favorites),
+                                ('is_in_shopping_cart', CheckList))
+            if requested(name) or name in self.request.query_params
+        })
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request,
+            partial(super().list, request, *args, **kwargs),
+            f'{recipe_list_cache.get_generation()}:{request.get_full_path()}'
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            updated_at = Recipe.objects.filter(
+                pk=kwargs['pk']
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        return self.conditional_response(
+            request,
+            partial(super().retrieve, request, *args, **kwargs),
+            f'{recipe_list_cache.get_generation()}:{request.get_full_path()}:'
+            f'{updated_at}'
+        )
+
+    def overlay_viewer_state(self, data):
+        data = super().overlay_viewer_state(data)
+        recipes = data['results']
+        if recipes and isinstance(recipes[0].get('author'), dict) and (
+            'is_subscribed' in recipes[0]['author']
+        ):
+            subscriptions = UserSerializer(
+                context=self.get_serializer_context()
+            ).get_subscriptions()
+            for recipe in recipes:
+                recipe['author']['is_subscribed'] = (
+                    recipe['author']['id'] in subscriptions
+                )
+        return data
+
     def get_serializer_class(self):
         if self.request.method in permissions.SAFE_METHODS:
             return RecipeSerializer
@@ -75,20 +165,6 @@ class RecipeViewSet(ModelViewSet):
         obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @staticmethod
-    def write_txt_data(ingredients):
-        data = ''
-
-        for ingredient in ingredients:
-            row = (
-                f'{ingredient["ingredient__name"]}, '
-                f'{ingredient["total_amount"]}, '
-                f'{ingredient["ingredient__measurement_unit"]}'
-            )
-            data += (row + ' || ')
-
-        return data
-
     @action(detail=True, methods=['post'],
             url_path='favorite', permission_classes=(IsAuthenticated,))
     def favorite(self, request, pk):
@@ -107,22 +183,107 @@ class RecipeViewSet(ModelViewSet):
     def delete_shopping_cart(self, request, pk):
         return self.delete_object(CheckList, pk, request)
 
-    @action(detail=False, methods=['get'], url_path='download_shopping_cart')
+    @action(detail=False, methods=['get'], url_path='download_shopping_cart',
+            permission_classes=(IsAuthenticated,),
+            renderer_classes=(ShoppingCartTextRenderer,
+                              ShoppingCartCSVRenderer,
+                              ShoppingCartJSONRenderer))
     def download_shopping_cart(self, request):
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__checklist__user=request.user
-        ).values(
-            'ingredient__name', 'ingredient__measurement_unit'
-        ).annotate(
-            total_amount=Sum('amount')
+        ingredients = request.user.cart_items.values(
+            'ingredient__name', 'ingredient__measurement_unit', 'total_amount'
         ).order_by('ingredient__name')
 
-        data = self.write_txt_data(ingredients)
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.stream(ingredients.iterator()),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="Ingredients.{renderer.format}"'
+        )
+        return response
+
+    @action(detail=False, methods=['get'], url_path='shopping_cart_summary',
+            permission_classes=(IsAuthenticated,))
+    def shopping_cart_summary(self, request):
+        serializer = CartItemSerializer(
+            request.user.cart_items.select_related(
+                'ingredient'
+            ).order_by('ingredient__name'),
+            many=True
+        )
+        return Response(serializer.data)
 
-        return FileResponse(data,
-                            as_attachment=True,
-                            content_type='text/plain',
-                            filename='Ingredients.txt')
+    @action(detail=False, methods=['get'],
+            permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        author_ids = list(request.user.subscriber.values_list(
+            'recipe_owner_id', flat=True
+        ))
+        paginator = FeedPagination()
+        keys = paginator.paginate_keys(partial(get_feed_keys, author_ids),
+                                       request)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for _, recipe_id in keys]
+        )
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for _, recipe_id in keys
+             if recipe_id in recipes],
+            many=True
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = decode_sync_token(since)
+            except (ValueError, OverflowError, binascii.Error):
+                return Response({'since': 'Неверный токен синхронизации'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if is_sync_token_expired(since):
+                return Response(
+                    {'since': 'Токен устарел, нужна полная синхронизация'},
+                    status=status.HTTP_410_GONE
+                )
+        else:
+            since = None
+        changes = get_changes(self.get_queryset(), request.user, since)
+        changes['recipes'] = self.get_serializer(changes['recipes'],
+                                                 many=True).data
+        return Response(changes)
+
+    @action(detail=False, methods=['get'], url_path='what_to_cook')
+    def what_to_cook(self, request):
+        try:
+            ingredient_ids = [
+                int(ingredient_id)
+                for value in request.query_params.getlist('ingredients')
+                for ingredient_id in value.split(',') if ingredient_id
+            ]
+        except ValueError:
+            return Response({'ingredients': 'Ожидались id ингредиентов'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not ingredient_ids:
+            return Response({'ingredients': 'Укажите хотя бы один ингредиент'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = PageNumberPagination()
+        result_page = paginator.paginate_queryset(
+            recipe_ingredient_index.rank(ingredient_ids), request
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _ in result_page]
+        )
+        page = []
+        for recipe_id, coverage in result_page:
+            if recipe_id in recipes:
+                recipes[recipe_id].coverage = coverage
+                page.append(recipes[recipe_id])
+        serializer = CoverageRecipeSerializer(page, many=True,
+                                              context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
 
 class FoodgramUserViewSet(UserViewSet):
@@ -162,6 +323,10 @@ class FoodgramUserViewSet(UserViewSet):
         )
         paginator = PageNumberPagination()
         result_page = paginator.paginate_queryset(queryset, request)
+        fields = get_query_list(request, 'fields')
+        if fields is None or 'recipes' in fields:
+            ReturnRecipesCountSerializer.prefetch_recipes(result_page,
+                                                          request)
         serializer = ReturnRecipesCountSerializer(result_page,
                                                   many=True,
                                                   context={'request': request})
@@ -178,3 +343,10 @@ class FoodgramUserViewSet(UserViewSet):
                             status=status.HTTP_400_BAD_REQUEST)
         follow.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['GET'])
+@permission_classes((IsAdminUser, ))
+def metrics(request):
+    return HttpResponse(registry.render(),
+                        content_type='text/plain; version=0.0.4')
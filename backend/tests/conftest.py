@@ -0,0 +1,94 @@
+import pytest
+from rest_framework.test import APIClient
+
+from foodgram_api.models import Ingredient, Recipe, RecipeIngredient, Tag
+
+IMAGE = ('data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAQMAAAAl21'
+         'bKAAAAA1BMVEUAAACnej3aAAAAAXRSTlMAQObYZgAAAApJREFUCNdjYAAAAAIAAeIh'
+         'vDMAAAAASUVORK5CYII=')
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create_user(
+        email='author@foodgram.ru', username='author',
+        first_name='Автор', last_name='Рецептов', password='password'
+    )
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        email='user@foodgram.ru', username='user',
+        first_name='Пользователь', last_name='Фудграма', password='password'
+    )
+
+
+def make_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def author_client(author):
+    return make_client(author)
+
+
+@pytest.fixture
+def user_client(user):
+    return make_client(user)
+
+
+@pytest.fixture
+def guest_client():
+    return make_client()
+
+
+@pytest.fixture
+def tags():
+    return [
+        Tag.objects.create(name='Завтрак', color='#E26C2D', slug='breakfast'),
+        Tag.objects.create(name='Обед', color='#49B64E', slug='lunch'),
+    ]
+
+
+@pytest.fixture
+def ingredients():
+    return [
+        Ingredient.objects.create(name='Соль', measurement_unit='г'),
+        Ingredient.objects.create(name='Сахар', measurement_unit='г'),
+        Ingredient.objects.create(name='Молоко', measurement_unit='мл'),
+    ]
+
+
+@pytest.fixture
+def make_recipe(author):
+    def make_recipe(ingredients, tags=(), name='Рецепт'):
+        recipe = Recipe.objects.create(
+            author=author, name=name, text='Описание', cooking_time=10,
+            image='images/recipe.png'
+        )
+        recipe.tags.set(tags)
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                             amount=amount)
+            for ingredient, amount in ingredients
+        )
+        return recipe
+    return make_recipe
+
+
+def recipe_payload(ingredients, tags, name='Рецепт'):
+    return {
+        'ingredients': [
+            {'id': ingredient.id, 'amount': amount}
+            for ingredient, amount in ingredients
+        ],
+        'tags': [tag.id for tag in tags],
+        'name': name,
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': IMAGE,
+    }
@@ -0,0 +1,25 @@
+import os
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+from foodgram_api.images import save_original
+
+
+@pytest.mark.django_db
+def test_collect_media_without_images_dir(settings, tmp_path, capsys):
+    settings.MEDIA_ROOT = str(tmp_path)
+    call_command('collect_media')
+    assert 'Проверено файлов: 0' in capsys.readouterr().out
+
+
+@pytest.mark.django_db
+def test_collect_media_keeps_reuploaded_image(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    name = save_original(ContentFile(b'image', name='recipe.png'))
+    path = tmp_path / name
+    os.utime(path, (0, 0))
+    assert save_original(ContentFile(b'image', name='recipe.png')) == name
+    call_command('collect_media', '--min-age', '60')
+    assert path.exists()
@@ -0,0 +1,56 @@
+import pytest
+
+
+@pytest.mark.django_db
+def test_recipe_list_not_modified_without_queries(guest_client, ingredients,
+                                                  make_recipe,
+                                                  django_assert_num_queries):
+    make_recipe([(ingredients[0], 1)])
+    response = guest_client.get('/api/recipes/')
+    assert response.status_code == 200
+    with django_assert_num_queries(0):
+        response = guest_client.get('/api/recipes/',
+                                    HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_recipe_list_etag_depends_on_viewer(guest_client, user_client,
+                                            user, ingredients, make_recipe):
+    recipe = make_recipe([(ingredients[0], 1)])
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    etag = guest_client.get('/api/recipes/')['ETag']
+    response = user_client.get('/api/recipes/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['results'][0]['is_favorited'] is True
+
+
+@pytest.mark.django_db
+def test_recipe_detail_etag_depends_on_fields(guest_client, ingredients,
+                                              make_recipe):
+    recipe = make_recipe([(ingredients[0], 1)])
+    url = f'/api/recipes/{recipe.id}/'
+    full = guest_client.get(url)
+    response = guest_client.get(url, {'fields': 'name'},
+                                HTTP_IF_NONE_MATCH=full['ETag'])
+    assert response.status_code == 200
+    assert response.json() == {'id': recipe.id, 'name': recipe.name}
+    response = guest_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 200
+    assert response.json()['id'] == recipe.id
+
+
+@pytest.mark.django_db
+def test_recipe_detail_ignores_if_modified_since(guest_client, author,
+                                                 ingredients, make_recipe):
+    recipe = make_recipe([(ingredients[0], 1)])
+    url = f'/api/recipes/{recipe.id}/'
+    response = guest_client.get(url)
+    assert 'Last-Modified' not in response
+    author.first_name = 'Новое имя'
+    author.save()
+    response = guest_client.get(
+        url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+    )
+    assert response.status_code == 200
+    assert response.json()['author']['first_name'] == 'Новое имя'
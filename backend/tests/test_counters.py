@@ -0,0 +1,31 @@
+import pytest
+
+from foodgram_api.models import Recipe
+from users.models import FoodgramUser
+
+
+@pytest.mark.django_db
+def test_recipe_save_keeps_counters(user_client, author_client, ingredients,
+                                    make_recipe):
+    recipe = make_recipe([(ingredients[0], 1)])
+    stale = Recipe.objects.get(pk=recipe.pk)
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    stale.name = 'Новое название'
+    stale.save()
+    recipe.refresh_from_db()
+    assert recipe.name == 'Новое название'
+    assert (recipe.favorites_count, recipe.in_carts_count) == (1, 1)
+
+
+@pytest.mark.django_db
+def test_user_save_keeps_counters(author, ingredients, make_recipe,
+                                  user_client):
+    stale = FoodgramUser.objects.get(pk=author.pk)
+    make_recipe([(ingredients[0], 1)])
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    stale.first_name = 'Новое имя'
+    stale.save()
+    author.refresh_from_db()
+    assert author.first_name == 'Новое имя'
+    assert (author.recipes_count, author.followers_count) == (1, 1)
@@ -0,0 +1,50 @@
+import pytest
+
+from foodgram_api.images import claim_image_job, run_image_job
+from foodgram_api.models import ImageJob, ImageStatus, Recipe
+from tests.conftest import recipe_payload
+
+
+def create_recipe(client, ingredients, tags):
+    response = client.post('/api/recipes/',
+                           recipe_payload([(ingredients[0], 1)], tags),
+                           format='json')
+    assert response.status_code == 201
+    return Recipe.objects.get(pk=response.data['id'])
+
+
+@pytest.mark.django_db
+def test_patch_keeps_worker_image_status(author_client, ingredients, tags):
+    recipe = create_recipe(author_client, ingredients, tags)
+    stale = Recipe.objects.get(pk=recipe.pk)
+    assert stale.image_status == ImageStatus.PENDING
+    run_image_job(claim_image_job())
+    stale.name = 'Новое название'
+    stale.save()
+    recipe.refresh_from_db()
+    assert recipe.image_status == ImageStatus.READY
+    response = author_client.patch(
+        f'/api/recipes/{recipe.id}/',
+        recipe_payload([(ingredients[1], 2)], tags), format='json'
+    )
+    assert response.status_code == 200
+    recipe.refresh_from_db()
+    assert recipe.image_status == ImageStatus.READY
+
+
+@pytest.mark.django_db
+def test_reupload_requeues_failed_job(author_client, ingredients, tags):
+    recipe = create_recipe(author_client, ingredients, tags)
+    ImageJob.objects.filter(image=recipe.image.name).update(
+        status=ImageStatus.FAILED, attempts=3, error='Ошибка'
+    )
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image_status=ImageStatus.FAILED
+    )
+    recipe = create_recipe(author_client, ingredients, tags)
+    job = ImageJob.objects.get(image=recipe.image.name)
+    assert (job.status, job.attempts, job.error) == (
+        ImageStatus.PENDING, 0, ''
+    )
+    assert recipe.image_status == ImageStatus.PENDING
+    assert claim_image_job() == job
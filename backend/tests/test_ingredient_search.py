@@ -0,0 +1,29 @@
+import pytest
+from django.core.cache import cache
+
+from foodgram_api.models import Ingredient
+from foodgram_api.search import ingredient_index
+
+
+def search(client, name):
+    response = client.get('/api/ingredients/', {'name': name})
+    assert response.status_code == 200
+    return [ingredient['name'] for ingredient in response.json()]
+
+
+@pytest.mark.django_db
+def test_prefix_matches_first(guest_client, ingredients):
+    Ingredient.objects.create(name='Сахарная пудра', measurement_unit='г')
+    Ingredient.objects.create(name='Тростниковый сахар', measurement_unit='г')
+    assert search(guest_client, 'сах') == [
+        'Сахар', 'Сахарная пудра', 'Тростниковый сахар'
+    ]
+
+
+@pytest.mark.django_db
+def test_index_follows_shared_generation(guest_client, ingredients):
+    assert search(guest_client, 'мол') == ['Молоко']
+    # Другой процесс меняет данные и сбрасывает только общее поколение.
+    Ingredient.objects.filter(pk=ingredients[2].pk).update(name='Молоко 3%')
+    cache.incr(ingredient_index.generation.version_key)
+    assert search(guest_client, 'мол') == ['Молоко 3%']
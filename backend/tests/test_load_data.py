@@ -0,0 +1,16 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+def test_load_data_invalidates_caches(guest_client, ingredients, tmp_path):
+    assert guest_client.get('/api/ingredients/', {'name': 'мук'}).json() == []
+    assert guest_client.get('/api/tags/').json() == []
+    path = tmp_path / 'ingredients.csv'
+    path.write_text('мука,г\n', encoding='utf-8')
+    call_command('load_data', '--ingredients', str(path))
+    response = guest_client.get('/api/ingredients/', {'name': 'мук'})
+    assert [ingredient['name'] for ingredient in response.json()] == ['мука']
+    assert [tag['slug'] for tag in guest_client.get('/api/tags/').json()] == [
+        'breakfast', 'lunch', 'dinner'
+    ]
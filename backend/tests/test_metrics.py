@@ -0,0 +1,27 @@
+import pytest
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from foodgram_api.views import metrics
+
+
+@pytest.mark.django_db
+def test_metrics_route_disabled_by_default(guest_client):
+    assert guest_client.get('/api/_metrics').status_code == 404
+
+
+@pytest.mark.django_db
+def test_metrics_require_admin(user, django_user_model):
+    factory = APIRequestFactory()
+    assert metrics(factory.get('/api/_metrics')).status_code == 401
+    request = factory.get('/api/_metrics')
+    force_authenticate(request, user)
+    assert metrics(request).status_code == 403
+    admin = django_user_model.objects.create_superuser(
+        email='admin@foodgram.ru', username='admin', first_name='Админ',
+        last_name='Фудграма', password='password'
+    )
+    request = factory.get('/api/_metrics')
+    force_authenticate(request, admin)
+    response = metrics(request)
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain')
@@ -0,0 +1,25 @@
+import pytest
+from django.core.cache import cache
+
+from foodgram_api.cache import tags_response
+from foodgram_api.models import Tag
+
+
+@pytest.mark.django_db
+def test_tags_not_modified(guest_client, tags):
+    response = guest_client.get('/api/tags/')
+    assert response.status_code == 200
+    response = guest_client.get('/api/tags/',
+                                HTTP_IF_NONE_MATCH=response['ETag'])
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+def test_tags_follow_shared_version(guest_client, tags):
+    etag = guest_client.get('/api/tags/')['ETag']
+    # Другой процесс меняет данные и сбрасывает только общую версию.
+    Tag.objects.filter(pk=tags[0].pk).update(name='Ужин')
+    cache.incr(tags_response.version_key)
+    response = guest_client.get('/api/tags/', HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()[0]['name'] == 'Ужин'
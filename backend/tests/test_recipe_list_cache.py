@@ -0,0 +1,18 @@
+import pytest
+
+
+def flags(client):
+    response = client.get('/api/recipes/')
+    assert response.status_code == 200
+    return [(recipe['is_favorited'], recipe['is_in_shopping_cart'])
+            for recipe in response.json()['results']]
+
+
+@pytest.mark.django_db
+def test_cached_page_overlays_viewer_flags(guest_client, user_client,
+                                           ingredients, make_recipe):
+    recipe = make_recipe([(ingredients[0], 1)])
+    assert flags(guest_client) == [(False, False)]
+    user_client.post(f'/api/recipes/{recipe.id}/favorite/')
+    assert flags(user_client) == [(True, False)]
+    assert flags(guest_client) == [(False, False)]
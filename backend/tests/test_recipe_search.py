@@ -0,0 +1,22 @@
+import pytest
+
+from foodgram_api.models import Recipe
+
+
+@pytest.mark.django_db
+def test_name_match_ranks_above_text_match(guest_client, author):
+    recipes = [
+        Recipe.objects.create(
+            author=author, name=name, text=text, cooking_time=10,
+            image='images/recipe.png'
+        )
+        for name, text in (
+            ('Салат', 'Листья борщевика не добавлять, борщевик ядовит'),
+            ('Борщ украинский', 'Свёкла, капуста и картофель'),
+        )
+    ]
+    response = guest_client.get('/api/recipes/', {'search': 'борщ'})
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.json()['results']] == [
+        recipes[1].id, recipes[0].id
+    ]
@@ -0,0 +1,13 @@
+import pytest
+from django.core.management import call_command
+
+from foodgram_api.models import Ingredient, Recipe
+
+
+@pytest.mark.django_db
+def test_seed_data_outside_backend_dir(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    call_command('seed_data', '--users', '3', '--recipes', '5',
+                 '--follows', '1', '--favorites', '1', '--cart', '1')
+    assert Ingredient.objects.exists()
+    assert Recipe.objects.count() == 5
@@ -0,0 +1,98 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from foodgram_api.models import Ingredient
+from .conftest import recipe_payload
+
+SUMMARY_URL = '/api/recipes/shopping_cart_summary/'
+
+
+def cart_amounts(client):
+    response = client.get(SUMMARY_URL)
+    assert response.status_code == 200
+    return {item['name']: item['amount'] for item in response.json()}
+
+
+@pytest.mark.django_db
+def test_cart_totals_follow_ingredient_edits(author_client, user_client,
+                                             ingredients, tags, make_recipe):
+    salt, sugar, milk = ingredients
+    soup = make_recipe([(salt, 10), (milk, 200)], tags[:1], name='Суп')
+    porridge = make_recipe([(salt, 3), (sugar, 5)], tags[:1], name='Каша')
+    for recipe in (soup, porridge):
+        assert user_client.post(
+            f'/api/recipes/{recipe.id}/shopping_cart/'
+        ).status_code == 201
+    assert cart_amounts(user_client) == {'Соль': 13, 'Молоко': 200,
+                                         'Сахар': 5}
+
+    response = author_client.patch(
+        f'/api/recipes/{soup.id}/',
+        recipe_payload([(milk, 200)], tags[:1], name='Суп'), format='json'
+    )
+    assert response.status_code == 200
+    assert cart_amounts(user_client) == {'Соль': 3, 'Молоко': 200,
+                                         'Сахар': 5}
+
+    response = author_client.patch(
+        f'/api/recipes/{soup.id}/',
+        recipe_payload([(milk, 150), (salt, 4)], tags[:1], name='Суп'),
+        format='json'
+    )
+    assert response.status_code == 200
+    assert cart_amounts(user_client) == {'Соль': 7, 'Молоко': 150,
+                                         'Сахар': 5}
+
+    user_client.delete(f'/api/recipes/{porridge.id}/shopping_cart/')
+    assert cart_amounts(user_client) == {'Соль': 4, 'Молоко': 150}
+
+
+@pytest.mark.django_db
+def test_cart_download_uses_totals(user_client, ingredients, make_recipe):
+    salt, sugar, _ = ingredients
+    recipe = make_recipe([(salt, 2), (sugar, 7)])
+    user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    response = user_client.get('/api/recipes/download_shopping_cart/',
+                               {'format': 'csv'})
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content).decode().splitlines() == [
+        'name,amount,measurement_unit', 'Сахар,7,г', 'Соль,2,г'
+    ]
+
+
+@pytest.mark.django_db
+def test_cart_download_text(user_client, ingredients, make_recipe):
+    salt, sugar, _ = ingredients
+    recipe = make_recipe([(salt, 2), (sugar, 7)])
+    user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    response = user_client.get('/api/recipes/download_shopping_cart/')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/plain; charset=utf-8'
+    assert b''.join(response.streaming_content).decode() == (
+        'Сахар, 7, г\nСоль, 2, г\n'
+    )
+
+
+def count_delete_queries(recipe):
+    with CaptureQueriesContext(connection) as queries:
+        recipe.delete()
+    return len(queries)
+
+
+@pytest.mark.django_db
+def test_recipe_delete_refreshes_cart_once(user_client, make_recipe):
+    ingredients = [
+        Ingredient.objects.create(name=f'Ингредиент {number}',
+                                  measurement_unit='г')
+        for number in range(8)
+    ]
+    small = make_recipe([(ingredient, 1) for ingredient in ingredients[:2]],
+                        name='Маленький')
+    large = make_recipe([(ingredient, 1) for ingredient in ingredients],
+                        name='Большой')
+    kept = make_recipe([(ingredients[0], 5)], name='Оставшийся')
+    for recipe in (small, large, kept):
+        user_client.post(f'/api/recipes/{recipe.id}/shopping_cart/')
+    assert count_delete_queries(small) == count_delete_queries(large)
+    assert cart_amounts(user_client) == {'Ингредиент 0': 5}
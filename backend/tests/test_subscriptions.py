@@ -0,0 +1,19 @@
+import pytest
+from django.utils import timezone
+
+from foodgram_api.models import Recipe
+
+
+@pytest.mark.django_db
+def test_recipes_limit_breaks_pub_date_ties_by_id(author, user_client,
+                                                  ingredients, make_recipe):
+    recipes = [make_recipe([(ingredients[0], 1)], name=f'Рецепт {number}')
+               for number in range(3)]
+    Recipe.objects.update(pub_date=timezone.now())
+    user_client.post(f'/api/users/{author.id}/subscribe/')
+    response = user_client.get('/api/users/subscriptions/',
+                               {'recipes_limit': 2})
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.json()['results'][0][
+        'recipes'
+    ]] == [recipes[2].id, recipes[1].id]
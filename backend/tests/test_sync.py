@@ -0,0 +1,39 @@
+from base64 import urlsafe_b64encode
+
+import pytest
+
+CHANGES_URL = '/api/recipes/changes/'
+
+
+def encode(value):
+    return urlsafe_b64encode(value.encode()).decode()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('token', [
+    '!!', 'abc', encode('not a number'), encode('-99999999999999999'),
+    encode('99999999999999999999999'),
+])
+def test_malformed_sync_token(guest_client, token):
+    response = guest_client.get(CHANGES_URL, {'since': token})
+    assert response.status_code == 400
+    assert 'since' in response.json()
+
+
+@pytest.mark.django_db
+def test_sync_reports_changes_since_token(user_client, ingredients,
+                                          make_recipe):
+    first = make_recipe([(ingredients[0], 1)], name='Первый')
+    response = user_client.get(CHANGES_URL)
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.json()['recipes']] == [
+        first.id
+    ]
+    token = response.json()['token']
+
+    recipe_id = first.id
+    user_client.post(f'/api/recipes/{recipe_id}/favorite/')
+    first.delete()
+    response = user_client.get(CHANGES_URL, {'since': token}).json()
+    assert response['deleted'] == [recipe_id]
+    assert response['favorites'] == {'added': [], 'removed': [recipe_id]}
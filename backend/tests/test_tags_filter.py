@@ -0,0 +1,42 @@
+import pytest
+
+from foodgram_api.models import Tag
+from foodgram_api.search import tag_mask_index
+from .conftest import recipe_payload
+
+
+def recipe_ids(client, tags):
+    response = client.get('/api/recipes/', {'tags': tags})
+    assert response.status_code == 200
+    return [recipe['id'] for recipe in response.json()['results']]
+
+
+@pytest.mark.django_db
+def test_tag_filter_follows_tag_change(author_client, guest_client,
+                                       ingredients, tags, make_recipe):
+    breakfast, lunch = tags
+    recipe = make_recipe([(ingredients[0], 1)], [breakfast])
+    assert recipe_ids(guest_client, 'breakfast') == [recipe.id]
+
+    response = author_client.patch(
+        f'/api/recipes/{recipe.id}/',
+        recipe_payload([(ingredients[0], 1)], [lunch]), format='json'
+    )
+    assert response.status_code == 200
+    assert recipe_ids(guest_client, 'breakfast') == []
+    assert recipe_ids(guest_client, 'lunch') == [recipe.id]
+    assert recipe_ids(guest_client, ['breakfast', 'lunch']) == [recipe.id]
+
+
+@pytest.mark.django_db
+def test_tag_filter_finds_tags_unknown_to_the_process(guest_client,
+                                                      ingredients, tags,
+                                                      make_recipe):
+    tag_mask_index.load()
+    Tag.objects.bulk_create([
+        Tag(name='Ужин', color='#8775D2', slug='dinner')
+    ])
+    dinner = Tag.objects.get(slug='dinner')
+    recipe = make_recipe([(ingredients[0], 1)], [dinner])
+    assert recipe_ids(guest_client, 'dinner') == [recipe.id]
+    assert recipe_ids(guest_client, 'missing') == []
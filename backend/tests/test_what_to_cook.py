@@ -0,0 +1,37 @@
+import pytest
+from django.utils import timezone
+
+from foodgram_api.models import Recipe, RecipeIngredient
+
+
+def what_to_cook(client, ingredients):
+    response = client.get('/api/recipes/what_to_cook/', {
+        'ingredients': ','.join(str(ingredient.id)
+                                for ingredient in ingredients)
+    })
+    assert response.status_code == 200
+    return [(recipe['id'], recipe['coverage'])
+            for recipe in response.json()['results']]
+
+
+@pytest.mark.django_db
+def test_ranked_by_coverage(guest_client, ingredients, make_recipe):
+    full = make_recipe([(ingredients[0], 1)], name='Полный')
+    half = make_recipe([(ingredients[0], 1), (ingredients[1], 1)],
+                       name='Половина')
+    assert what_to_cook(guest_client, ingredients[:1]) == [
+        (full.id, 1.0), (half.id, 0.5)
+    ]
+
+
+@pytest.mark.django_db
+def test_index_follows_other_process_writes(guest_client, ingredients,
+                                            make_recipe):
+    recipe = make_recipe([(ingredients[0], 1)])
+    assert what_to_cook(guest_client, ingredients[1:2]) == []
+    # Запись из другого процесса: без сигналов, но с новым updated_at.
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe=recipe, ingredient=ingredients[1], amount=1)
+    ])
+    Recipe.objects.filter(pk=recipe.pk).update(updated_at=timezone.now())
+    assert what_to_cook(guest_client, ingredients[1:2]) == [(recipe.id, 0.5)]
@@ -1,6 +1,5 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from django.db.models import Count
 
 from .models import FoodgramUser, Follow
 
@@ -13,20 +12,6 @@ class Follow(admin.ModelAdmin):
 @admin.register(FoodgramUser)
 class CustomUser(BaseUserAdmin):
     list_display = ('username', 'email', 'first_name',
-                    'last_name', 'get_followers', 'get_recipes')
+                    'last_name', 'followers_count', 'recipes_count')
 
     list_filter = ('email', 'username')
-
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            recipes_count=Count('recipes'),
-            followers_count=Count('recipeauthor'),
-        )
-
-    @admin.display(description='Подписчики')
-    def get_followers(self, obj):
-        return obj.followers_count
-
-    @admin.display(description='Созданные рецепты')
-    def get_recipes(self, obj):
-        return obj.recipes_count
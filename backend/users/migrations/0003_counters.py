@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:32
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def fill_counters(apps, schema_editor):
+    FoodgramUser = apps.get_model('users', 'FoodgramUser')
+    FoodgramUser.objects.update(
+        recipes_count=count_subquery(
+            apps.get_model('foodgram_api', 'Recipe'), 'author'
+        ),
+        followers_count=count_subquery(
+            apps.get_model('users', 'Follow'), 'recipe_owner'
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_foodgramuser_options'),
+        ('foodgram_api', '0006_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Подписчики'),
+        ),
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Созданные рецепты'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
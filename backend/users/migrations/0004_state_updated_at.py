@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='state_updated_at',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Изменение избранного, покупок и подписок'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def fill_state_updated_at(apps, schema_editor):
+    apps.get_model('users', 'FoodgramUser').objects.filter(
+        state_updated_at__isnull=True
+    ).update(state_updated_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_state_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_state_updated_at,
+                             migrations.RunPython.noop),
+    ]
@@ -1,12 +1,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from foodgram_api.model_mixins import DerivedFieldsMixin
 from foodgram_api.constants import (MAX_USER_CHARACTERS,
                                     MAX_EMAIL_CHARACTERS)
 from .validators import validator_username
 
 
-class FoodgramUser(AbstractUser):
+class FoodgramUser(DerivedFieldsMixin, AbstractUser):
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
@@ -32,12 +33,27 @@ class FoodgramUser(AbstractUser):
     last_name = models.CharField(
         'Фамилия',
         max_length=MAX_USER_CHARACTERS)
+    recipes_count = models.PositiveIntegerField(
+        'Созданные рецепты',
+        default=0,
+        editable=False)
+    followers_count = models.PositiveIntegerField(
+        'Подписчики',
+        default=0,
+        editable=False)
+    state_updated_at = models.DateTimeField(
+        'Изменение избранного, покупок и подписок',
+        null=True,
+        editable=False)
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('first_name', 'last_name')
 
+    # Поля, которые меняются только запросами с F() и сигналами.
+    derived_fields = ('recipes_count', 'followers_count', 'state_updated_at')
+
     def __str__(self):
         return self.username
 